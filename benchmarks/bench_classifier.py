@@ -0,0 +1,96 @@
+""" Compara os backends do classificador de gênero (pytorch, onnx, int8):
+tempo de carregamento, latência de um documento e vazão em lote.
+
+Uso:
+    python benchmarks/bench_classifier.py [--backends pytorch onnx int8] [--docs 64] [--repeats 20]
+
+Os documentos são trechos de data/teste.txt (ou --corpus) com cerca de
+--doc-words palavras. Na primeira execução de onnx/int8 o tempo de
+carregamento inclui a conversão do modelo; execute de novo para medir o
+carregamento a partir do cache em disco.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from src.classification.backends import build_pipeline, BACKENDS
+from src.classification.model import MODEL_NAME, BATCH_SIZE, classify_documents
+
+
+def build_documents(path, n_docs, doc_words):
+    """ Divide o texto de base em n_docs documentos de doc_words palavras """
+    with open(path, encoding='utf-8') as f:
+        words = f.read().split()
+
+    docs = []
+    start = 0
+    while len(docs) < n_docs:
+        docs.append(" ".join(words[start:start + doc_words]))
+        start = (start + doc_words) % max(1, len(words) - doc_words)
+    return docs
+
+
+def bench_backend(backend, docs, repeats, batch_size):
+    start = time.perf_counter()
+    classifier = build_pipeline(MODEL_NAME, backend)
+    load_time = time.perf_counter() - start
+
+    # aquecimento, fora das medições
+    classify_documents(docs[:1], batch_size=batch_size, classifier=classifier)
+
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        classify_documents([docs[i % len(docs)]], batch_size=batch_size, classifier=classifier)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = classify_documents(docs, batch_size=batch_size, classifier=classifier)
+    throughput = len(docs) / (time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "load": load_time,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "throughput": throughput,
+        "labels": [r[0]['label'] if r else None for r in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join(root_dir, 'data', 'teste.txt'))
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--docs', type=int, default=64)
+    parser.add_argument('--doc-words', type=int, default=400)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    docs = build_documents(args.corpus, args.docs, args.doc_words)
+    print(f"{len(docs)} documentos de ~{args.doc_words} palavras, batch_size={args.batch_size}\n")
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = bench_backend(backend, docs, args.repeats, args.batch_size)
+        r = results[backend]
+        print(f"{backend:8s} carga {r['load']:6.1f}s | latência p50 {r['p50'] * 1000:7.1f}ms "
+              f"p95 {r['p95'] * 1000:7.1f}ms | vazão {r['throughput']:6.1f} docs/s")
+
+    # concordância do gênero principal com o modelo em precisão completa
+    if 'pytorch' in results:
+        reference = results['pytorch']['labels']
+        for backend, r in results.items():
+            if backend != 'pytorch':
+                agree = sum(a == b for a, b in zip(reference, r['labels'])) / len(reference)
+                print(f"{backend}: mesmo gênero principal que pytorch em {agree:.1%} dos documentos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+""" Compara os backends de extração de PDF (pymupdf e tika): tempo de
+inicialização a frio e tempo por página.
+
+Uso:
+    python benchmarks/bench_pdf.py [--pdf arquivo.pdf] [--pages 200] [--backends pymupdf tika] [--workers 1 4]
+
+Sem --pdf, um PDF com --pages páginas é gerado (com o PyMuPDF) a partir de
+data/teste.txt. O tempo a frio é medido em um processo novo para cada
+backend e inclui a importação do módulo e, no Tika, a inicialização da JVM e
+do servidor. O tempo por página é medido no processo atual, já aquecido.
+Por fim, a extração com limpeza (iter_cleaned_pages) é medida com cada
+número de processos em --workers.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+
+def build_pdf(path, n_pages, source):
+    """ Gera um PDF de n_pages páginas com trechos do texto de base """
+    import pymupdf
+
+    with open(source, encoding='utf-8') as f:
+        words = f.read().split()
+
+    doc = pymupdf.open()
+    per_page = 350
+    for i in range(n_pages):
+        start = (i * per_page) % max(1, len(words) - per_page)
+        page = doc.new_page()
+        page.insert_textbox(pymupdf.Rect(50, 50, 550, 780), " ".join(words[start:start + per_page]), fontsize=9)
+        page.insert_text((540, 810), str(i + 1), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def cold_start(backend, pdf_path):
+    """ Executa a primeira extração em um processo novo e retorna o tempo total """
+    code = (
+        "import time; start = time.perf_counter()\n"
+        f"import sys; sys.path.append({root_dir!r})\n"
+        "from src.extract_pdf.extractor import iter_raw_pages\n"
+        f"pages = sum(1 for _ in iter_raw_pages({pdf_path!r}, {backend!r}))\n"
+        "import json; print(json.dumps({'pages': pages, 'seconds': time.perf_counter() - start}))\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def per_page(backend, pdf_path):
+    """ Tempo de cada página (no Tika, o documento é processado de uma vez e o tempo é dividido) """
+    from src.extract_pdf.extractor import iter_raw_pages
+
+    times = []
+    start = time.perf_counter()
+    last = start
+    for _ in iter_raw_pages(pdf_path, backend):
+        now = time.perf_counter()
+        times.append(now - last)
+        last = now
+
+    total = time.perf_counter() - start
+    if backend == 'tika':
+        times = [total / max(1, len(times))] * len(times)
+    return total, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf', default=None)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--source', default=os.path.join(root_dir, 'data', 'teste.txt'))
+    parser.add_argument('--backends', nargs='+', choices=['pymupdf', 'tika'], default=['pymupdf', 'tika'])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    pdf_path = args.pdf
+    if pdf_path is None:
+        pdf_path = os.path.join(tempfile.mkdtemp(), 'bench.pdf')
+        build_pdf(pdf_path, args.pages, args.source)
+
+    size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+    print(f"PDF: {pdf_path} ({size_mb:.1f}MB)\n")
+
+    for backend in args.backends:
+        try:
+            cold = cold_start(backend, pdf_path)
+            total, times = per_page(backend, pdf_path)
+        except Exception as e:
+            print(f"{backend:8s} indisponível: {e}")
+            continue
+
+        times_ms = sorted(t * 1000 for t in times)
+        p95 = times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))] if times_ms else 0.0
+        print(f"{backend:8s} a frio {cold['seconds']:6.2f}s ({cold['pages']} páginas) | "
+              f"aquecido {total:6.2f}s | por página: mediana {statistics.median(times_ms or [0]):6.2f}ms "
+              f"p95 {p95:6.2f}ms")
+
+    if 'pymupdf' in args.backends:
+        from src.extract_pdf.extractor import iter_cleaned_pages
+
+        print()
+        for workers in dict.fromkeys(args.workers):
+            start = time.perf_counter()
+            first = None
+            pages = 0
+            for _ in iter_cleaned_pages(pdf_path, 'pymupdf', workers):
+                if first is None:
+                    first = time.perf_counter() - start
+                pages += 1
+            total = time.perf_counter() - start
+            print(f"extração + limpeza com {workers} processo(s): {total:6.2f}s "
+                  f"({pages / total:6.1f} páginas/s, primeira página em {(first or 0) * 1000:.0f}ms)")
+
+
+if __name__ == '__main__':
+    main()
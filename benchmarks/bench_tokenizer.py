@@ -0,0 +1,63 @@
+""" Compara o caminho antigo (clean_text + tokenizer com word_tokenize) com a
+tokenização em uma única passada (tokenize_text).
+
+Uso:
+    python benchmarks/bench_tokenizer.py [--corpus arquivo.txt] [--size-mb 100]
+
+Sem --corpus, o texto de data/teste.txt é repetido até atingir o tamanho pedido.
+"""
+import argparse
+import os
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+
+from src.preprocessing.cleaner import clean_text
+from src.preprocessing.tokenizer import tokenizer, tokenize_text
+
+
+def build_corpus(path, size_mb):
+    """ Repete o texto de base até atingir aproximadamente size_mb megabytes """
+    with open(path, encoding='utf-8') as f:
+        base = f.read()
+
+    target = size_mb * 1024 * 1024
+    repeats = max(1, target // len(base.encode('utf-8')))
+    return base * repeats
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=os.path.join(root_dir, 'data', 'teste.txt'))
+    parser.add_argument('--size-mb', type=int, default=100)
+    args = parser.parse_args()
+
+    text = build_corpus(args.corpus, args.size_mb)
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    print(f"Corpus: {size_mb:.1f}MB")
+
+    fused_tokens, fused_time = timed(tokenize_text, text)
+    print(f"tokenize_text:            {fused_time:8.2f}s  {size_mb / fused_time:7.1f}MB/s  {len(fused_tokens)} tokens")
+
+    try:
+        cleaned, clean_time = timed(clean_text, text)
+        old_tokens, tokenize_time = timed(tokenizer, cleaned)
+    except LookupError:
+        print("Caminho antigo indisponível: execute nltk.download('punkt_tab') para habilitar o word_tokenize.")
+        return
+
+    old_time = clean_time + tokenize_time
+    print(f"clean_text + tokenizer:   {old_time:8.2f}s  {size_mb / old_time:7.1f}MB/s  {len(old_tokens)} tokens")
+    print(f"Speedup: {old_time / fused_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
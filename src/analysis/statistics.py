@@ -1,23 +1,144 @@
 import pandas as pd
+from collections import Counter
+from collections.abc import Mapping
 from sklearn.feature_extraction.text import TfidfVectorizer
+from .tfidf import IdfModel, top_k_indices
+
+class WordLengthStats:
+    """ Acumulador das estatísticas de tamanho das palavras.
+
+    Média e variância são atualizadas lote a lote pelo método de Welford
+    (na forma de Chan et al. para combinar lotes), e um histograma dos
+    tamanhos fornece a mediana exata. A memória usada depende apenas do
+    número de tamanhos distintos, e acumuladores de blocos ou processos
+    diferentes podem ser combinados com merge().
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = Counter()
+
+    def update(self, tokens):
+        """ Adiciona um lote de tokens """
+        self._add_histogram(Counter(map(len, tokens)))
+        return self
+
+    def update_counts(self, word_counts):
+        """ Adiciona uma contagem de palavras (palavra -> ocorrências) """
+        histogram = Counter()
+        for word, count in word_counts.items():
+            histogram[len(word)] += count
+
+        self._add_histogram(histogram)
+        return self
+
+    def merge(self, other):
+        """ Combina com outro acumulador """
+        self._combine(other.count, other.mean, other.m2)
+        self.histogram.update(other.histogram)
+        return self
+
+    def subtract(self, other):
+        """ Remove as palavras de outro acumulador (por exemplo, de um trecho editado).
+
+        Média e variância são recalculadas a partir do histograma, que tem
+        contagens inteiras, então remoções sucessivas não acumulam erros de
+        arredondamento.
+        """
+        self.histogram.subtract(other.histogram)
+        self.histogram = +self.histogram
+
+        count = sum(self.histogram.values())
+        self.count = count
+        self.mean = sum(length * n for length, n in self.histogram.items()) / count if count else 0.0
+        self.m2 = sum(n * (length - self.mean) ** 2 for length, n in self.histogram.items())
+        return self
+
+    def _add_histogram(self, histogram):
+        count = sum(histogram.values())
+        if not count:
+            return
+
+        mean = sum(length * n for length, n in histogram.items()) / count
+        m2 = sum(n * (length - mean) ** 2 for length, n in histogram.items())
+
+        self._combine(count, mean, m2)
+        self.histogram.update(histogram)
+
+    def _combine(self, count, mean, m2):
+        if not count:
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def median(self):
+        """ Mediana exata a partir do histograma acumulado """
+        lower_pos = (self.count + 1) // 2
+        upper_pos = self.count // 2 + 1
+        lower = upper = None
+        seen = 0
+
+        for length in sorted(self.histogram):
+            seen += self.histogram[length]
+            if lower is None and seen >= lower_pos:
+                lower = length
+            if seen >= upper_pos:
+                upper = length
+                break
+
+        return (lower + upper) / 2
+
+    def std(self):
+        """ Desvio padrão amostral, como o pandas """
+        if self.count < 2:
+            return float('nan')
+        return (self.m2 / (self.count - 1)) ** 0.5
+
+    def to_metrics(self):
+        """ Métricas no formato usado pelo restante da aplicação """
+        if not self.count:
+            return {"media": None, "mediana": None, "desvio_padrao": None}
+
+        return {
+            "media": self.mean,
+            "mediana": self.median(),
+            "desvio_padrao": self.std()
+        }
 
 def calculate_metrics(tokens):
     """ Cálculo de métricas estatísticas
+
+    Aceita uma lista de tokens, uma contagem de palavras (Counter), um
+    iterável de lotes de tokens ou um WordLengthStats já preenchido. A lista
+    com os tamanhos de todos os tokens nunca é montada.
     """
-    if not tokens:
-        return {"media": None, "mediana": None, "desvio_padrao": None}
-    
-    tamanhos = [len(x) for x in tokens]
-    serie = pd.Series(tamanhos)
-    
-    return {
-        "media": serie.mean(),
-        "mediana": serie.median(),
-        "desvio_padrao": serie.std()
-    }
+    if isinstance(tokens, WordLengthStats):
+        return tokens.to_metrics()
+
+    stats = WordLengthStats()
+
+    if isinstance(tokens, Mapping):
+        stats.update_counts(tokens)
+    elif isinstance(tokens, (list, tuple)) and (not tokens or isinstance(tokens[0], str)):
+        stats.update(tokens)
+    else:
+        for batch in tokens:
+            stats.update([batch] if isinstance(batch, str) else batch)
 
-def calculate_tfidf(tokens):
+    return stats.to_metrics()
+
+def calculate_tfidf(tokens, top_k=None):
     """ Calcula o TF-IDF para os tokens e retorna os valores em um DataFrame ordenado por relevância. 
+
+    Com top_k, apenas os k termos mais relevantes são selecionados (seleção
+    parcial sobre a matriz esparsa, sem convertê-la para densa).
     """
 
     if not tokens:
@@ -29,11 +150,44 @@ def calculate_tfidf(tokens):
     vectorizer = TfidfVectorizer()
     tfidf_matriz = vectorizer.fit_transform([documento])
 
-    # extraindo termos
-    termos = vectorizer.get_feature_names_out()
-    valores = tfidf_matriz.toarray()[0]
+    # extraindo termos presentes no documento direto da matriz esparsa
+    linha = tfidf_matriz.tocsr()
+    termos = vectorizer.get_feature_names_out()[linha.indices]
+    valores = linha.data
+
+    return _tfidf_dataframe(termos, valores, top_k)
+
+def calculate_tfidf_from_counts(word_counts, idf_model=None, top_k=None):
+    """ Calcula o TF-IDF a partir da contagem de palavras, sem reajustar um
+    vetorizador a cada chamada.
+
+    Com um IdfModel treinado em um corpus de referência, os termos são
+    ponderados pela raridade no corpus. Sem modelo o IDF é constante e o
+    resultado é igual ao de calculate_tfidf: a frequência do termo normalizada
+    pela norma L2. Assim como o TfidfVectorizer, termos com menos de dois
+    caracteres são ignorados. Com top_k, retorna apenas os k termos mais
+    relevantes.
+    """
+    termos = {termo: contagem for termo, contagem in word_counts.items() if len(termo) > 1}
+
+    if not termos:
+        print("Contagem de palavras vazia. Nenhum TF-IDF gerado.")
+        return pd.DataFrame()
+
+    if idf_model is None:
+        idf_model = IdfModel()
+
+    termos, valores = idf_model.transform(termos)
+
+    return _tfidf_dataframe(termos, valores, top_k)
+
+def _tfidf_dataframe(termos, valores, top_k=None):
+    """ Monta o DataFrame ordenado por relevância (desempate alfabético) """
+    if top_k is not None:
+        indices = top_k_indices(valores, top_k, termos)
+        termos, valores = termos[indices], valores[indices]
 
     df_tfidf = pd.DataFrame({"termo": termos, "tfidf": valores})
-    df_tfidf = df_tfidf.sort_values(by="tfidf", ascending=False)  # ordenar por relevância
+    df_tfidf = df_tfidf.sort_values(by=["tfidf", "termo"], ascending=[False, True])  # ordenar por relevância
 
     return df_tfidf
\ No newline at end of file
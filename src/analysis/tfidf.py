@@ -0,0 +1,164 @@
+import argparse
+import gzip
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..preprocessing.stream import iter_decoded_chunks, iter_token_batches
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', 'idf_model.json.gz'
+)
+
+class IdfModel:
+    """ Frequências de documento aprendidas em um corpus de referência.
+
+    O IDF segue a mesma fórmula suavizada do TfidfVectorizer:
+    idf = ln((1 + n) / (1 + df)) + 1. Termos ausentes do corpus recebem o
+    maior IDF possível (df = 0).
+    """
+
+    def __init__(self, document_frequencies=None, n_documents=0):
+        self.document_frequencies = Counter(document_frequencies or {})
+        self.n_documents = n_documents
+        self._vocabulary = None
+        self._idf = None
+
+    def partial_fit(self, documents):
+        """ Atualiza o modelo com mais documentos (cada um uma lista de tokens) """
+        for tokens in documents:
+            self.document_frequencies.update(set(tokens))
+            self.n_documents += 1
+
+        self._vocabulary = None
+        return self
+
+    def merge(self, other):
+        """ Combina com um modelo treinado em outra parte do corpus """
+        self.document_frequencies.update(other.document_frequencies)
+        self.n_documents += other.n_documents
+        self._vocabulary = None
+        return self
+
+    def fit_files(self, paths, workers=None):
+        """ Treina com arquivos .txt (um documento por arquivo) em paralelo """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for terms in executor.map(_file_terms, paths, chunksize=8):
+                self.document_frequencies.update(terms)
+                self.n_documents += 1
+
+        self._vocabulary = None
+        return self
+
+    def _build_index(self):
+        terms = list(self.document_frequencies)
+        df = np.fromiter((self.document_frequencies[t] for t in terms), dtype=np.float64, count=len(terms))
+
+        self._vocabulary = {term: i for i, term in enumerate(terms)}
+        self._idf = np.log((1 + self.n_documents) / (1 + df)) + 1
+
+    def transform(self, word_counts):
+        """ Calcula o TF-IDF de um documento a partir da sua contagem de palavras.
+
+        Retorna os arrays de termos e de valores (normalizados pela norma L2),
+        apenas para os termos presentes no documento.
+        """
+        if self._vocabulary is None:
+            self._build_index()
+
+        terms = np.array(list(word_counts), dtype=object)
+        tf = np.fromiter(word_counts.values(), dtype=np.float64, count=len(terms))
+        ids = np.fromiter((self._vocabulary.get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+
+        oov_idf = np.log(1 + self.n_documents) + 1
+        idf = np.where(ids >= 0, self._idf[ids], oov_idf) if len(self._idf) else np.full(len(terms), oov_idf)
+
+        scores = tf * idf
+        norm = np.linalg.norm(scores)
+        if norm:
+            scores /= norm
+
+        return terms, scores
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """ Salva o modelo em JSON compactado """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump({
+                "n_documents": self.n_documents,
+                "document_frequencies": self.document_frequencies
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """ Carrega um modelo salvo com save() """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        return cls(data["document_frequencies"], data["n_documents"])
+
+def top_k_indices(scores, k, terms=None):
+    """ Índices dos k maiores valores, por seleção parcial.
+
+    Custa O(n) em vez da ordenação completa O(n log n): apenas os valores
+    maiores ou iguais ao k-ésimo são ordenados depois. Empates são
+    desfeitos pela ordem alfabética de terms (se informado), então o
+    resultado é o mesmo das k primeiras linhas da ordenação completa.
+    """
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+
+    if k >= len(scores):
+        candidates = np.arange(len(scores))
+    else:
+        kth = np.partition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(-scores <= kth)
+
+    if terms is None:
+        order = np.argsort(-scores[candidates], kind='stable')
+    else:
+        order = np.lexsort((terms[candidates], -scores[candidates]))
+
+    return candidates[order][:k]
+
+def _file_terms(path):
+    """ Conjunto de termos de um arquivo, lido em streaming """
+    terms = set()
+    with open(path, 'rb') as f:
+        for batch in iter_token_batches(iter_decoded_chunks(f, errors='replace')):
+            terms.update(batch)
+
+    return terms
+
+def load_default_model():
+    """ Carrega o modelo de referência, se existir (caminho em ANALISADOR_IDF_MODEL) """
+    path = os.environ.get('ANALISADOR_IDF_MODEL', DEFAULT_MODEL_PATH)
+    if not os.path.exists(path):
+        return None
+
+    return IdfModel.load(path)
+
+def list_corpus_files(corpus_dir):
+    """ Arquivos .txt de um diretório, recursivamente """
+    paths = []
+    for root, _, files in os.walk(corpus_dir):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith('.txt'))
+
+    return sorted(paths)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Treina o modelo de IDF a partir de um corpus de arquivos .txt")
+    parser.add_argument('corpus_dir')
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    model = IdfModel().fit_files(list_corpus_files(args.corpus_dir), workers=args.workers)
+    model.save(args.output)
+    print(f"{model.n_documents} documentos, {len(model.document_frequencies)} termos -> {args.output}")
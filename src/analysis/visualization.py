@@ -261,11 +261,11 @@ def plot_metrics(media, mediana, std):
     return fig
 
 
-def generate_wordcloud(tokens):
-    """ Gera e retorna uma nuvem de palavras
+def generate_wordcloud(word_counts):
+    """ Gera e retorna uma nuvem de palavras a partir da contagem de palavras
     """
 
-    if not tokens:
+    if not word_counts:
         return None
     
     set_custom_style()
@@ -273,9 +273,6 @@ def generate_wordcloud(tokens):
     gs = GridSpec(1, 1, figure=fig)
     ax = fig.add_subplot(gs[0])
     
-    # gera texto a partir dos tokens
-    text = " ".join(tokens)
-    
     # gerar cores
     def color_func(*args, **kwargs):
         return "#%02x%02x%02x" % tuple(np.random.randint(0, 255, size=3))
@@ -292,7 +289,7 @@ def generate_wordcloud(tokens):
         prefer_horizontal=0.7,
         relative_scaling=0.5,
         random_state=42
-    ).generate(text)
+    ).generate_from_frequencies(word_counts)
    
     ax.imshow(wordcloud, interpolation='bilinear')
     ax.set_axis_off()
@@ -444,4 +441,40 @@ def plot_word_frequency(word_counts):
              fontsize=9, color='#555555', ha='left')
     
     plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-    return fig
\ No newline at end of file
+    return fig
+
+def plot_cooccurrence(ccr, vocabulary, word_counts, top_n=20):
+    """ Gera um mapa de calor da coocorrência entre as palavras mais frequentes.
+    Retorna None se nenhuma delas estiver no vocabulário.
+    """
+    posicoes = {termo: i for i, termo in enumerate(vocabulary)}
+    termos = [termo for termo, _ in word_counts.most_common() if termo in posicoes][:top_n]
+    if not termos:
+        return None
+
+    set_custom_style()
+    indices = [posicoes[termo] for termo in termos]
+
+    # apenas a submatriz dos termos selecionados é convertida para densa
+    submatriz = ccr[indices][:, indices].toarray()
+
+    fig, ax = plt.subplots(figsize=(12, 10))
+
+    custom_cmap = LinearSegmentedColormap.from_list(
+        'custom_blue', ['#ffffff', '#1a75ff', '#00264d'])
+
+    sns.heatmap(submatriz, ax=ax, cmap=custom_cmap, xticklabels=termos, yticklabels=termos,
+                square=True, linewidths=0.5, linecolor='#eeeeee',
+                cbar_kws={'label': 'Coocorrências', 'shrink': 0.8})
+
+    ax.set_title("Coocorrência entre as Palavras Mais Frequentes",
+                pad=20, fontweight='bold', fontsize=16, color='#333333')
+    ax.tick_params(axis='x', rotation=45)
+    plt.setp(ax.get_xticklabels(), ha='right')
+
+    fig.text(0.01, 0.01,
+             "Cada célula indica quantas vezes as duas palavras aparecem próximas (na mesma janela de contexto).",
+             fontsize=9, color='#555555', ha='left')
+
+    plt.tight_layout(rect=[0, 0.03, 1, 0.97])
+    return fig
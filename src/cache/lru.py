@@ -0,0 +1,56 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+def content_hash(text):
+    """ Hash SHA-256 do conteúdo, usado como chave de cache por documento """
+    if isinstance(text, str):
+        text = text.encode('utf-8')
+    return hashlib.sha256(text).hexdigest()
+
+class LRUCache:
+    """ Cache em memória limitado a maxsize entradas, descartando as usadas
+    há mais tempo. Seguro para uso por várias sessões ao mesmo tempo.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Retorna o valor guardado (ou default) e o marca como usado recentemente """
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        """ Guarda o valor, descartando a entrada mais antiga se necessário """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """ Retorna o valor guardado ou calcula, guarda e retorna compute() """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        """ Remove todas as entradas """
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from .lru import LRUCache, content_hash
+
+# limites do cache em disco: as linhas mais antigas (pela data de gravação)
+# são removidas ao abrir o banco e a cada PRUNE_EVERY gravações
+DB_MAX_ROWS = int(os.environ.get('ANALISADOR_CACHE_DB_MAX_ROWS', '10000'))
+DB_MAX_AGE_DAYS = float(os.environ.get('ANALISADOR_CACHE_DB_MAX_AGE_DAYS', '30'))
+PRUNE_EVERY = 100
+
+def normalize_input(text):
+    """ Forma canônica do texto para a chave de cache (Unicode NFC, quebras de linha \\n, sem espaços nas pontas) """
+    text = unicodedata.normalize('NFC', text)
+    return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+class _SQLiteStore:
+    """ Tabela de resultados em um arquivo SQLite, compartilhada entre processos.
+
+    O tamanho é limitado: mantém no máximo max_rows linhas, gravadas há menos
+    de max_age_days dias.
+    """
+
+    def __init__(self, path, max_rows=DB_MAX_ROWS, max_age_days=DB_MAX_AGE_DAYS):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "namespace TEXT, key TEXT, value TEXT, created REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._prune()
+
+    def _prune(self):
+        """ Remove as linhas expiradas e, acima do limite, as mais antigas (com o lock e a transação abertos) """
+        self._conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.max_age_days * 86400,))
+        self._conn.execute(
+            "DELETE FROM results WHERE rowid IN "
+            "(SELECT rowid FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        )
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, namespace, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+
+    def clear(self, namespace):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE namespace = ?", (namespace,))
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def _get_store(path):
+    """ Uma única conexão por arquivo de banco no processo """
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = _SQLiteStore(path)
+        return _stores[path]
+
+class ResultCache:
+    """ Cache de resultados de modelos, por conteúdo da entrada e versão do modelo.
+
+    As entradas ficam em um LRU em memória (compartilhado pelas sessões do
+    servidor) e, se ANALISADOR_CACHE_DB (ou db_path) apontar para um arquivo
+    SQLite, também em disco, sobrevivendo a reinícios. A chave é o hash das
+    entradas normalizadas junto com a versão, então trocar o modelo, o prompt
+    ou os parâmetros invalida os resultados antigos. Os valores precisam ser
+    serializáveis em JSON.
+    """
+
+    def __init__(self, namespace, version, maxsize=256, db_path=None):
+        self.namespace = namespace
+        self.version = version
+        self._memory = LRUCache(maxsize)
+
+        db_path = db_path or os.environ.get('ANALISADOR_CACHE_DB')
+        self._store = _get_store(db_path) if db_path else None
+
+    def key(self, *inputs):
+        """ Chave para as entradas (textos) informadas """
+        partes = [self.namespace, self.version] + [normalize_input(texto) for texto in inputs]
+        return content_hash("\x00".join(partes))
+
+    def get(self, key, default=None):
+        """ Procura em memória e depois em disco """
+        missing = object()
+        value = self._memory.get(key, missing)
+        if value is not missing:
+            return value
+
+        if self._store is not None:
+            value = self._store.get(self.namespace, key)
+            if value is not None:
+                self._memory.set(key, value)
+                return value
+
+        return default
+
+    def set(self, key, value):
+        """ Guarda em memória e, se configurado, em disco """
+        self._memory.set(key, value)
+        if self._store is not None:
+            self._store.set(self.namespace, key, value)
+
+    def get_or_compute(self, key, compute):
+        """ Retorna o valor guardado ou calcula, guarda e retorna compute() """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def __contains__(self, key):
+        missing = object()
+        return self.get(key, missing) is not missing
+
+    def clear(self):
+        """ Remove as entradas deste cache (em memória e em disco) """
+        self._memory.clear()
+        if self._store is not None:
+            self._store.clear(self.namespace)
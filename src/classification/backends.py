@@ -0,0 +1,98 @@
+import os
+import re
+import shutil
+import tempfile
+
+from transformers import pipeline, AutoTokenizer
+
+BACKENDS = ('pytorch', 'onnx', 'int8')
+DEFAULT_BACKEND = 'pytorch'
+
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', 'models'
+)
+
+def get_backend():
+    """ Backend escolhido em ANALISADOR_CLASSIFIER_BACKEND (pytorch, onnx ou int8) """
+    backend = os.environ.get('ANALISADOR_CLASSIFIER_BACKEND', DEFAULT_BACKEND).strip().lower()
+    if backend not in BACKENDS:
+        print(f"Backend de classificação desconhecido '{backend}', usando '{DEFAULT_BACKEND}'.")
+        return DEFAULT_BACKEND
+
+    return backend
+
+def artifact_path(model_name, backend, cache_dir=None):
+    """ Caminho do modelo convertido em disco para esse backend """
+    slug = re.sub(r'[^\w.-]+', '--', model_name)
+    return os.path.join(cache_dir or os.environ.get('ANALISADOR_MODEL_CACHE', CACHE_DIR), f"{slug}-{backend}")
+
+def _onnx_model(model_name, path):
+    """ Exporta o modelo para ONNX na primeira vez e carrega a versão salva nas seguintes.
+
+    A exportação é gravada em um diretório temporário e só então renomeada
+    para path, então uma exportação interrompida nunca é tomada como pronta.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    if os.path.isdir(path):
+        return ORTModelForSequenceClassification.from_pretrained(path), AutoTokenizer.from_pretrained(path)
+
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(path) + '.tmp-', dir=os.path.dirname(path))
+    try:
+        model.save_pretrained(tmp)
+        tokenizer.save_pretrained(tmp)
+        os.replace(tmp, path)
+    except OSError:
+        # outro processo concluiu a mesma exportação primeiro
+        if not os.path.isdir(path):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return model, tokenizer
+
+def _int8_model(model_name, path):
+    """ Quantiza as camadas lineares para int8 (quantização dinâmica) e guarda o resultado """
+    import torch
+    from transformers import AutoModelForSequenceClassification
+
+    weights = os.path.join(path, 'model.pt')
+    if os.path.exists(weights):
+        return torch.load(weights, weights_only=False), AutoTokenizer.from_pretrained(path)
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    # os pesos são gravados por último: sua presença indica que o tokenizador já está salvo
+    os.makedirs(path, exist_ok=True)
+    tokenizer.save_pretrained(path)
+    torch.save(model, weights + '.tmp')
+    os.replace(weights + '.tmp', weights)
+    return model, tokenizer
+
+def build_pipeline(model_name, backend=None, cache_dir=None):
+    """ Cria o pipeline de classificação no backend pedido.
+
+    'onnx' exporta o modelo para ONNX Runtime (requer optimum[onnxruntime]) e
+    'int8' aplica a quantização dinâmica do PyTorch; nos dois casos o modelo
+    convertido é guardado em disco e reaproveitado. A saída (rótulos e
+    confianças) tem o mesmo formato do pipeline original. Se o backend não
+    estiver disponível, usa o modelo PyTorch em precisão completa.
+    """
+    backend = backend or get_backend()
+
+    if backend != 'pytorch':
+        loader = _onnx_model if backend == 'onnx' else _int8_model
+        try:
+            model, tokenizer = loader(model_name, artifact_path(model_name, backend, cache_dir))
+            return pipeline("text-classification", model=model, tokenizer=tokenizer, top_k=None)
+        except ImportError as e:
+            print(f"Backend '{backend}' indisponível ({e}); usando o modelo PyTorch.")
+
+    return pipeline("text-classification", model=model_name, top_k=None)
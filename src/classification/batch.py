@@ -0,0 +1,187 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .model import load_classifiers, classify_documents, BATCH_SIZE
+from ..analysis.tfidf import list_corpus_files
+
+DOCS_PER_CHUNK = 256  # documentos classificados (e gravados) por vez
+
+def iter_directory(corpus_dir):
+    """ Documentos .txt de um diretório, como pares (id, texto); o id é o caminho relativo """
+    for path in list_corpus_files(corpus_dir):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            yield os.path.relpath(path, corpus_dir), f.read()
+
+def iter_jsonl(file, text_field='text', id_field='id'):
+    """ Documentos de um arquivo JSONL (um objeto por linha), como pares (id, texto).
+
+    Sem o campo de id, o número da linha é usado.
+    """
+    for line_number, line in enumerate(file):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield str(record.get(id_field, line_number)), record.get(text_field) or ""
+
+def iter_documents(source, text_field='text', id_field='id'):
+    """ Documentos de um diretório, de um arquivo JSONL ou da entrada padrão ('-') """
+    if source == '-':
+        yield from iter_jsonl(sys.stdin, text_field, id_field)
+    elif os.path.isdir(source):
+        yield from iter_directory(source)
+    else:
+        with open(source, encoding='utf-8') as f:
+            yield from iter_jsonl(f, text_field, id_field)
+
+def _record(doc_id, genero):
+    """ Linha do resultado: gênero principal e confiança de cada gênero """
+    return {
+        "id": doc_id,
+        "label": genero[0]['label'] if genero else None,
+        "score": genero[0]['score'] if genero else None,
+        "scores": {item['label']: item['score'] for item in genero}
+    }
+
+class JsonlWriter:
+    """ Grava os resultados em um arquivo JSONL, acrescentando a cada lote """
+
+    def __init__(self, path):
+        self.path = path
+
+    def done_ids(self):
+        """ Ids já gravados; uma última linha incompleta (execução interrompida) é descartada """
+        if not os.path.exists(self.path):
+            return set()
+
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                f.truncate(complete)
+
+        return {json.loads(line)["id"] for line in data[:complete].decode('utf-8').splitlines() if line.strip()}
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+class ParquetWriter:
+    """ Grava cada lote como um arquivo part-NNNNN.parquet em um diretório """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._parts = len(self._part_files())
+
+    def _part_files(self):
+        return sorted(glob.glob(os.path.join(self.path, 'part-*.parquet')))
+
+    def done_ids(self):
+        """ Ids já gravados nos arquivos existentes """
+        done = set()
+        for part in self._part_files():
+            done.update(pd.read_parquet(part, columns=["id"])["id"])
+        return done
+
+    def reset(self):
+        for part in self._part_files():
+            os.remove(part)
+        self._parts = 0
+
+    def write(self, records):
+        df = pd.json_normalize(records)
+        final = os.path.join(self.path, f'part-{self._parts:05d}.parquet')
+
+        # grava em um arquivo temporário para que uma interrupção não deixe um arquivo corrompido
+        tmp = final + '.tmp'
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, final)
+        self._parts += 1
+
+def get_writer(output, output_format=None):
+    """ Escolhe o formato pela opção ou pela extensão (.jsonl; qualquer outro caminho vira um diretório Parquet) """
+    if output_format is None:
+        output_format = 'jsonl' if output.endswith('.jsonl') else 'parquet'
+
+    return JsonlWriter(output) if output_format == 'jsonl' else ParquetWriter(output)
+
+def classify_collection(documents, writer, batch_size=BATCH_SIZE, docs_per_chunk=DOCS_PER_CHUNK, resume=True, report=print):
+    """ Classifica uma coleção de documentos (pares (id, texto)) gravando os resultados aos poucos.
+
+    Os documentos são agrupados em lotes de docs_per_chunk; cada lote é
+    classificado com classify_documents e gravado antes do seguinte, então a
+    memória usada não depende do tamanho da coleção. Com resume, os ids já
+    presentes na saída são pulados, retomando uma execução interrompida.
+    Retorna o número de documentos classificados nesta execução.
+    """
+    classifier = load_classifiers()
+    if not resume:
+        writer.reset()
+    done = writer.done_ids() if resume else set()
+    if done and report:
+        report(f"Retomando: {len(done)} documentos já classificados")
+
+    total = 0
+    start = time.perf_counter()
+    chunk = []
+
+    def flush():
+        nonlocal total
+        generos = classify_documents([texto for _, texto in chunk], batch_size=batch_size, classifier=classifier)
+        writer.write([_record(doc_id, genero) for (doc_id, _), genero in zip(chunk, generos)])
+
+        total += len(chunk)
+        chunk.clear()
+        if report:
+            elapsed = time.perf_counter() - start
+            report(f"{total} documentos, {total / elapsed:.1f} docs/s")
+
+    for doc_id, texto in documents:
+        if doc_id in done:
+            continue
+        chunk.append((doc_id, texto))
+        if len(chunk) >= docs_per_chunk:
+            flush()
+
+    if chunk:
+        flush()
+
+    return total
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Classifica por gênero textual uma coleção de documentos")
+    parser.add_argument('source', help="diretório com arquivos .txt, arquivo JSONL ou '-' para a entrada padrão")
+    parser.add_argument('--output', required=True, help="arquivo .jsonl ou diretório Parquet")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None)
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--docs-per-chunk', type=int, default=DOCS_PER_CHUNK)
+    parser.add_argument('--no-resume', action='store_true', help="ignora resultados já gravados")
+    args = parser.parse_args()
+
+    writer = get_writer(args.output, args.format)
+    documents = iter_documents(args.source, args.text_field, args.id_field)
+
+    start = time.perf_counter()
+    total = classify_collection(
+        documents, writer,
+        batch_size=args.batch_size, docs_per_chunk=args.docs_per_chunk, resume=not args.no_resume
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{total} documentos em {elapsed:.1f}s -> {args.output}")
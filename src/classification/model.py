@@ -1,7 +1,17 @@
 import streamlit as st
 import pandas as pd
-from transformers import pipeline
 import plotly.express as px
+from .backends import build_pipeline, get_backend
+from ..cache.results import ResultCache
+
+MODEL_NAME = "classla/xlm-roberta-base-multilingual-text-genre-classifier"
+WINDOW_TOKENS = 510  # 512 posições do XLM-RoBERTa menos os tokens <s> e </s>
+WINDOW_STRIDE = 510  # janelas sem sobreposição: custo linear no tamanho do texto
+BATCH_SIZE = 16
+SEGMENT_CHARS = 100_000  # caracteres tokenizados de cada vez ao dividir o texto
+
+# resultados por texto; a versão inclui o backend e o tamanho das janelas
+_results = ResultCache("classificacao", f"{MODEL_NAME}:{get_backend()}:{WINDOW_TOKENS}:{WINDOW_STRIDE}")
 
 LABELS_MAP_PT = {
     'Other': 'Outro',
@@ -29,28 +39,122 @@ GENRE_COLORS = {
 
 @st.cache_resource
 def load_classifiers():
-    """Carrega o modelo de classificação de gênero textual."""
-    classifier_genero = pipeline("text-classification", 
-                                model="classla/xlm-roberta-base-multilingual-text-genre-classifier", 
-                                top_k=None)  
+    """Carrega o modelo de classificação de gênero textual (backend em ANALISADOR_CLASSIFIER_BACKEND)."""
+    classifier_genero = build_pipeline(MODEL_NAME)
     return classifier_genero
 
-def classificador(text_input):
-    """Classifica o texto por gênero textual e retorna os resultados ordenados por confiança."""
+def _segment_end(text, start, size):
+    """Fim do segmento que começa em start: até size caracteres, cortado no último espaço."""
+    end = start + size
+    if end >= len(text):
+        return len(text)
+
+    cut = max(text.rfind(' ', start, end), text.rfind('\n', start, end))
+    return cut if cut > start else end
+
+def split_windows(text, tokenizer, max_tokens=WINDOW_TOKENS, stride=WINDOW_STRIDE, segment_chars=SEGMENT_CHARS):
+    """Divide o texto original em janelas de até max_tokens tokens do modelo.
+
+    Os limites das janelas vêm dos offsets do tokenizador, então cada janela é
+    um trecho contínuo do texto (com pontuação e palavras funcionais). Retorna
+    a lista de (trecho, número de tokens).
+
+    O texto é tokenizado em segmentos de até segment_chars caracteres,
+    cortados em espaços, então a memória dos offsets não cresce com o
+    documento. A janela incompleta no fim de um segmento é refeita no
+    início do segmento seguinte.
+    """
+    windows = []
+    start = 0
+    size = segment_chars
+
+    while start < len(text):
+        end = _segment_end(text, start, size)
+        encoding = tokenizer(text[start:end], add_special_tokens=False, return_offsets_mapping=True)
+        offsets = encoding["offset_mapping"]
+        last = end >= len(text)
+
+        # o segmento precisa de mais de uma janela para que o texto avance
+        if not last and len(offsets) <= max_tokens:
+            size *= 2
+            continue
+        size = segment_chars
+        next_start = end
+
+        for pos in range(0, len(offsets), stride):
+            stop = min(pos + max_tokens, len(offsets))
+            if stop == len(offsets) and not last:
+                next_start = start + offsets[pos][0]
+                break
+
+            windows.append((text[start + offsets[pos][0]:start + offsets[stop - 1][1]], stop - pos))
+            if stop == len(offsets):
+                break
+
+        start = next_start
+
+    return windows
+
+def _as_score_list(result):
+    """Normaliza a saída do pipeline para uma lista de {label, score}."""
+    if isinstance(result, list) and result and isinstance(result[0], list):
+        return result[0]
+    if isinstance(result, list):
+        return result
+    return [result]
+
+def classify_documents(texts, batch_size=BATCH_SIZE, classifier=None):
+    """Classifica documentos inteiros por gênero textual.
+
+    Cada documento é dividido em janelas do tamanho do contexto do modelo e
+    as janelas de todos os documentos passam juntas pelo pipeline, em lotes
+    de batch_size. As janelas são ordenadas pelo tamanho antes, então cada
+    lote é preenchido (padding) só até a maior janela do próprio lote. As
+    confianças das janelas são combinadas pela média ponderada pelo número
+    de tokens de cada uma.
+
+    Retorna, para cada documento, a lista de {label, score} ordenada por
+    confiança (vazia para documentos sem texto).
+    """
+    if classifier is None:
+        classifier = load_classifiers()
+
+    windows = []
+    for doc_id, text in enumerate(texts):
+        if text and text.strip():
+            windows.extend((doc_id, trecho, peso) for trecho, peso in split_windows(text, classifier.tokenizer))
+
+    # lotes com janelas de tamanho parecido desperdiçam menos padding
+    order = sorted(range(len(windows)), key=lambda i: windows[i][2])
+    outputs = classifier([windows[i][1] for i in order], batch_size=batch_size, truncation=True)
+
+    scores = [{} for _ in texts]
+    weights = [0] * len(texts)
+    for i, result in zip(order, outputs):
+        doc_id, _, peso = windows[i]
+        weights[doc_id] += peso
+        for item in _as_score_list(result):
+            scores[doc_id][item['label']] = scores[doc_id].get(item['label'], 0.0) + peso * item['score']
+
+    return [
+        sorted(
+            ({'label': label, 'score': total / weights[doc_id]} for label, total in doc_scores.items()),
+            key=lambda x: x['score'], reverse=True
+        )
+        for doc_id, doc_scores in enumerate(scores)
+    ]
+
+def classificador(text_input, batch_size=BATCH_SIZE):
+    """Classifica o documento inteiro por gênero textual e retorna os resultados ordenados por confiança.
+
+    O resultado fica em cache pelo conteúdo do texto, então voltar à aba de
+    classificação com o mesmo documento não executa o modelo de novo.
+    """
     try:
-        classifier_genero = load_classifiers()
-        genero_result = classifier_genero(text_input)
-        
-        if isinstance(genero_result, list) and isinstance(genero_result[0], list):
-            genero = genero_result[0]
-        elif isinstance(genero_result, list):
-            genero = genero_result
-        else:
-            genero = [genero_result]
-        
-        genero = sorted(genero, key=lambda x: x['score'], reverse=True)
-        
-        return genero
+        return _results.get_or_compute(
+            _results.key(text_input),
+            lambda: classify_documents([text_input], batch_size=batch_size)[0]
+        )
     except Exception as e:
         st.error(f"Erro ao classificar o texto: {str(e)}")
         return None
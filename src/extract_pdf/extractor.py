@@ -1,11 +1,35 @@
-from tika import parser
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-import tempfile
+from .ocr import OCR_ENABLED, is_image_only, ocr_page
+
+# PyMuPDF >= 1.24 expõe o módulo "pymupdf"; versões antigas só "fitz"
+try:
+    import pymupdf
+except ImportError:
+    try:
+        import fitz as pymupdf
+    except ImportError:
+        pymupdf = None
 
 # os.environ['TIKA_SERVER_JAR'] = 'tika-server.jar'
 
+PDF_BACKENDS = ('pymupdf', 'tika')
+
+PAGES_PER_TASK = 32  # páginas extraídas por tarefa no modo paralelo
+PARALLEL_MIN_PAGES = 64  # abaixo disso, o custo de iniciar os processos não compensa
+
+# padrões compilados uma única vez e aplicados à página inteira; [^\S\n] é
+# qualquer espaço em branco exceto a quebra de linha, então nenhum casamento
+# atravessa o limite entre duas linhas. Todos começam por '\n', o que deixa o
+# mecanismo de regex saltar direto de uma quebra de linha para a próxima
+_PAGE_NUMBER_LINE = re.compile(r'\n[^\S\n]*(\d+)(?=\n|\Z)')
+_TRAILING_NUMBER_REVERSED = re.compile(r'\n[^\S\n]*\d+[^\S\n]+')
+_LEADING_DOT = re.compile(r'\n[^\S\n]*\.[^\S\n]*')
+_HYPHEN_END = re.compile(r'-[^\S\n]*\Z')
+
 def is_page_number_line(line: str, max_page_num: int = 1000) -> bool:
     """
     Determina se uma linha contém apenas um número de página.
@@ -26,69 +50,249 @@ def is_page_number_line(line: str, max_page_num: int = 1000) -> bool:
     
     return False
 
-def clean_page_numbers(text: str) -> str:
+def clean_page_numbers(text: str, max_page_num: int = 1000) -> str:
     """
     Remove números de página e limpa formatação do texto.
+
+    Em vez de percorrer as linhas, aplica três substituições com expressões
+    regulares sobre a página inteira, com o mesmo resultado da limpeza linha
+    a linha baseada em is_page_number_line.
     """
-    lines = text.split('\n')
-    cleaned_lines = []
-    previous_line = ''
-    
-    for i, line in enumerate(lines):
-        # pula a linha se for um número de página isolado
-        if is_page_number_line(line):
-            continue
-            
-        # preserva números que fazem parte da estrutura do documento
-        # remove apenas números que parecem ser números de página no final da linha
-        cleaned_line = re.sub(r'\s+\d+\s*$', '', line)
-            
-        # se a linha anterior termina com hífen e esta linha começa com espaços,
-        # mantém a formatação original
-        if previous_line.rstrip().endswith('-'):
-            cleaned_lines.append(cleaned_line)
+    # linhas formadas só por um número de página (com espaços apenas à esquerda)
+    # são removidas junto com a quebra de linha que as precede; o '\n' inicial
+    # permite tratar a primeira linha como as demais
+    def drop_page_number(match):
+        return '' if int(match.group(1)) <= max_page_num else match.group(0)
+
+    text = _PAGE_NUMBER_LINE.sub(drop_page_number, '\n' + text)
+    if not text:
+        return ''
+
+    # preserva números que fazem parte da estrutura do documento
+    # remove apenas números que parecem ser números de página no final da linha;
+    # no texto invertido o fim de cada linha vem logo após o '\n'
+    text = _TRAILING_NUMBER_REVERSED.sub('\n', (text + '\n')[::-1])[::-1]
+
+    # remove qualquer ponto sozinho no início da linha, exceto quando a linha
+    # anterior termina com hífen (palavra dividida entre as linhas)
+    def drop_leading_dot(match):
+        start = match.start()
+        if start and _HYPHEN_END.search(text, text.rfind('\n', 0, start) + 1, start):
+            return match.group(0)
+        return '\n'
+
+    # descarta o '\n' acrescentado no início e no fim
+    return _LEADING_DOT.sub(drop_leading_dot, text)[1:-1]
+
+def get_pdf_backend():
+    """ Backend de extração em ANALISADOR_PDF_BACKEND; por padrão o PyMuPDF, se instalado """
+    backend = os.environ.get('ANALISADOR_PDF_BACKEND', '').strip().lower()
+    if backend in PDF_BACKENDS:
+        return backend
+    return 'pymupdf' if pymupdf is not None else 'tika'
+
+def _read_pdf_bytes(pdf_file):
+    """ Bytes do PDF a partir de bytes, de um arquivo enviado pelo Streamlit ou de um caminho """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, str):
+        with open(pdf_file, 'rb') as f:
+            return f.read()
+    return pdf_file.getvalue()
+
+def _page_text(page, ocr=True):
+    """ Texto de uma página do PyMuPDF; páginas só com imagens passam pelo OCR.
+
+    Com ocr=False, retorna None para essas páginas, deixando o OCR para depois.
+    """
+    text = page.get_text()
+    if OCR_ENABLED and is_image_only(page, text):
+        return ocr_page(page) if ocr else None
+    return text
+
+def _has_image_only_pages(doc):
+    """ Indica se alguma página precisará de OCR; o texto só é extraído das páginas com imagens """
+    return OCR_ENABLED and any(page.get_images() and is_image_only(page, page.get_text()) for page in doc)
+
+def _pymupdf_pages(data):
+    """ Texto de cada página, extraído em memória (sem arquivo temporário nem JVM) """
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        for page in doc:
+            yield _page_text(page)
+
+def _tika_pages(data):
+    """ Texto de cada página pelo servidor Apache Tika (requer Java) """
+    from tika import parser
+
+    parsed_pdf = parser.from_buffer(data)
+
+    if 'content' in parsed_pdf:
+        text_content = parsed_pdf['content']
+    else:
+        text_content = parsed_pdf.get('text', '')
+
+    # as páginas vêm separadas por quebras de página
+    yield from (text_content or '').split('\f')
+
+def iter_raw_pages(pdf_file, backend=None):
+    """ Gera o texto bruto de cada página, na ordem do documento.
+
+    Usa o PyMuPDF, que processa uma página por vez direto dos bytes em
+    memória. Se ele não estiver instalado ou não conseguir abrir o arquivo,
+    recorre ao Tika.
+    """
+    data = _read_pdf_bytes(pdf_file)
+    backend = backend or get_pdf_backend()
+
+    if backend == 'pymupdf' and pymupdf is not None:
+        try:
+            pages = _pymupdf_pages(data)
+            first = next(pages, None)
+        except Exception as e:
+            print(f"PyMuPDF não conseguiu abrir o PDF ({e}); usando o Tika.")
         else:
-            # remove qualquer ponto sozinho no início da linha
-            cleaned_line = re.sub(r'^\s*\.\s*', '', cleaned_line)
-            cleaned_lines.append(cleaned_line)
-            
-        previous_line = cleaned_line
-    
-    return '\n'.join(cleaned_lines)
+            if first is not None:
+                yield first
+                yield from pages
+            return
+
+    yield from _tika_pages(data)
+
+# documento aberto uma vez em cada processo do modo paralelo
+_worker_doc = None
 
-def extract_pdf_to_text(pdf_file):
-    """Extrai texto de um arquivo PDF usando o Apache Tika e limpa formatação."""
+def _init_worker(data):
+    global _worker_doc
+    _worker_doc = pymupdf.open(stream=data, filetype="pdf")
+
+    # o paralelismo vem dos processos; cada Tesseract usa uma única thread
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+def _extract_range(start, stop, ocr=True):
+    """ Extrai e limpa as páginas [start, stop) no processo de trabalho.
+
+    Com ocr=False, as páginas que precisam de OCR voltam como None.
+    """
+    pages = []
+    for i in range(start, stop):
+        text = _page_text(_worker_doc[i], ocr)
+        pages.append(None if text is None else clean_page_numbers(text))
+    return pages
+
+def _ocr_page_task(index):
+    """ OCR e limpeza de uma única página no processo de trabalho """
+    return clean_page_numbers(ocr_page(_worker_doc[index]))
+
+def _parallel_pages(data, page_count, workers, pages_per_task):
+    """ Distribui faixas de páginas entre processos e gera as páginas limpas em ordem.
+
+    Apenas algumas faixas ficam em andamento ao mesmo tempo; assim que a
+    próxima faixa da ordem termina, suas páginas são entregues, sem esperar o
+    restante do documento. Com faixas de várias páginas, o OCR não é feito
+    dentro da faixa: cada página digitalizada encontrada vira uma tarefa
+    própria, enviada assim que a faixa termina, para que o OCR use todos os
+    processos.
+    """
+    workers = workers or os.cpu_count() or 1
+    ocr_in_range = pages_per_task == 1
+    ranges = iter([(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)])
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as executor:
+        def submit(start, stop):
+            # [faixa, páginas da faixa, tarefas de OCR por índice da página na faixa]
+            return [start, executor.submit(_extract_range, start, stop, ocr_in_range), None]
+
+        def schedule_ocr(entry):
+            start, future, _ = entry
+            entry[2] = {
+                offset: executor.submit(_ocr_page_task, start + offset)
+                for offset, text in enumerate(future.result()) if text is None
+            }
+
+        pending = deque(submit(*r) for _, r in zip(range(workers * 2), ranges))
+
+        while pending:
+            # o OCR das faixas já concluídas começa antes de chegar a vez delas
+            for entry in pending:
+                if entry[2] is None and entry[1].done():
+                    schedule_ocr(entry)
+
+            entry = pending.popleft()
+            if entry[2] is None:
+                schedule_ocr(entry)
+
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(submit(*next_range))
+
+            ocr_tasks = entry[2]
+            for offset, text in enumerate(entry[1].result()):
+                yield ocr_tasks[offset].result() if text is None else text
+
+def iter_cleaned_pages(pdf_file, backend=None, workers=None, pages_per_task=PAGES_PER_TASK):
+    """ Gera o texto limpo de cada página, na ordem do documento.
+
+    Com o PyMuPDF, documentos com pelo menos PARALLEL_MIN_PAGES páginas são
+    extraídos e limpos em paralelo por faixas de páginas (workers processos;
+    workers=1 desativa o paralelismo); cada página digitalizada encontrada
+    em uma faixa passa pelo OCR em uma tarefa própria. Documentos menores com
+    páginas digitalizadas também são processados em paralelo, uma página por
+    tarefa, já que o OCR de cada página custa muito mais que a extração. Cada
+    página é entregue assim que ela e as anteriores estão prontas.
+    """
+    data = _read_pdf_bytes(pdf_file)
+    backend = backend or get_pdf_backend()
+
+    if backend == 'pymupdf' and pymupdf is not None and workers != 1:
+        try:
+            with pymupdf.open(stream=data, filetype="pdf") as doc:
+                page_count = doc.page_count
+                # documentos grandes detectam as páginas digitalizadas nos próprios processos
+                scanned = 1 < page_count < PARALLEL_MIN_PAGES and _has_image_only_pages(doc)
+        except Exception:
+            page_count, scanned = 0, False
+
+        if page_count >= PARALLEL_MIN_PAGES or scanned:
+            yield from _parallel_pages(data, page_count, workers, 1 if scanned else pages_per_task)
+            return
+
+    for page in iter_raw_pages(data, backend):
+        yield clean_page_numbers(page)
+
+def iter_pdf_pages(pdf_file, backend=None, workers=None):
+    """ Gera (número da página, texto limpo) para cada página do PDF, a partir de 1.
+
+    O documento nunca é montado como uma única string: cada página pode ser
+    tokenizada e contada assim que é entregue (ver pipeline.analyzer.analyze_pages).
+    Páginas sem texto são geradas com o texto vazio, preservando a numeração.
+    """
+    for page_number, cleaned_page in enumerate(iter_cleaned_pages(pdf_file, backend, workers), start=1):
+        yield page_number, cleaned_page.strip()
+
+def get_pdf_page(pdf_file, page_number, backend=None):
+    """ Texto limpo de uma única página (numerada a partir de 1) """
+    data = _read_pdf_bytes(pdf_file)
+    backend = backend or get_pdf_backend()
+
+    if backend == 'pymupdf' and pymupdf is not None:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            if 1 <= page_number <= doc.page_count:
+                return clean_page_numbers(_page_text(doc[page_number - 1])).strip()
+            return ""
+
+    for numero, texto in iter_pdf_pages(data, backend, workers=1):
+        if numero == page_number:
+            return texto
+    return ""
+
+def extract_pdf_to_text(pdf_file, backend=None, workers=None):
+    """Extrai texto de um arquivo PDF (PyMuPDF, com o Apache Tika como alternativa) e limpa formatação."""
     try:
-        # cria um arquivo temporário para salvar o PDF carregado
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_pdf:
-            temp_pdf.write(pdf_file.getvalue())
-            temp_pdf_path = temp_pdf.name
-        
-        # extrai o conteúdo do PDF
-        parsed_pdf = parser.from_file(temp_pdf_path)
-        
-        # remove o arquivo temporário
-        os.unlink(temp_pdf_path)
-        
-        if 'content' in parsed_pdf:
-            text_content = parsed_pdf['content']
-        else:
-            text_content = parsed_pdf.get('text', '')
-            
-        if not text_content:
+        cleaned_pages = [texto for _, texto in iter_pdf_pages(pdf_file, backend, workers) if texto]
+
+        if not cleaned_pages:
             st.warning("Aviso: Nenhum texto foi extraído do PDF.")
             return ""
-            
-        # dividir o conteúdo em páginas
-        pages = text_content.split('\f')
-        
-        processed_text = ""
-        cleaned_pages = []
-
-        for page in pages:
-            cleaned_page = clean_page_numbers(page)
-            if cleaned_page.strip():
-                cleaned_pages.append(cleaned_page.strip())
 
         processed_text = '\n'.join(cleaned_pages)
 
@@ -96,4 +300,4 @@ def extract_pdf_to_text(pdf_file):
         
     except Exception as e:
         st.error(f"Erro ao processar o PDF: {str(e)}")
-        return ""
\ No newline at end of file
+        return ""
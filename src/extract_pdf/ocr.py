@@ -0,0 +1,80 @@
+import hashlib
+import os
+
+OCR_ENABLED = os.environ.get('ANALISADOR_OCR', '1') != '0'
+OCR_LANG = os.environ.get('ANALISADOR_OCR_LANG', 'por')
+# 300 dpi é o recomendado pelo Tesseract; 200 dpi reconhece bem texto corrido em bem menos tempo
+OCR_DPI = int(os.environ.get('ANALISADOR_OCR_DPI', '200'))
+
+OCR_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', 'ocr_cache'
+)
+
+# avisos já exibidos neste processo (um por tipo de falha, e não um por página)
+_warned = set()
+
+def _warn_once(message):
+    if message not in _warned:
+        _warned.add(message)
+        print(message)
+
+def is_image_only(page, text):
+    """ Página sem texto extraível, mas com imagens (por exemplo, uma página digitalizada) """
+    return not text.strip() and bool(page.get_images(full=True))
+
+def page_hash(page, dpi=OCR_DPI, lang=OCR_LANG):
+    """ Hash do conteúdo da página (fluxo de conteúdo e imagens), sem rasterizá-la.
+
+    A mesma digitalização enviada de novo, mesmo dentro de outro PDF, gera o
+    mesmo hash. A resolução e o idioma fazem parte da chave.
+    """
+    digest = hashlib.sha256(f"{dpi}:{lang}:{page.rect}:{page.rotation}".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(page.parent.xref_stream_raw(image[0]) or b'')
+
+    return digest.hexdigest()
+
+def _cache_path(key, cache_dir=None):
+    cache_dir = cache_dir or os.environ.get('ANALISADOR_OCR_CACHE', OCR_CACHE_DIR)
+    return os.path.join(cache_dir, key[:2], key + '.txt')
+
+def ocr_page(page, dpi=OCR_DPI, lang=OCR_LANG, cache_dir=None):
+    """ Reconhece o texto de uma página com o Tesseract, usando o cache em disco.
+
+    A página é rasterizada em tons de cinza na resolução dpi: resoluções
+    menores deixam o OCR mais rápido, maiores o deixam mais preciso. Se o
+    pytesseract ou o Tesseract (ou o idioma lang) não estiverem instalados,
+    retorna "" e a análise continua com as demais páginas.
+    """
+    try:
+        import pytesseract
+        from PIL import Image
+    except ImportError:
+        return ""
+
+    path = _cache_path(page_hash(page, dpi, lang), cache_dir)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    pix = page.get_pixmap(dpi=dpi, colorspace="gray")
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+    try:
+        text = pytesseract.image_to_string(image, lang=lang)
+    except pytesseract.TesseractNotFoundError:
+        _warn_once("Tesseract não encontrado; páginas digitalizadas ficarão sem texto.")
+        return ""
+    except pytesseract.TesseractError as e:
+        # por exemplo, o pacote do idioma (tesseract-ocr-por) não está instalado
+        _warn_once(f"Falha no OCR ({e.message.strip()}); páginas digitalizadas ficarão sem texto.")
+        return ""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(path + '.tmp', path)
+
+    return text
@@ -0,0 +1,203 @@
+import gc
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from langchain.llms import CTransformers
+from ..cache.lru import content_hash
+
+MODEL_REPO = "recogna-nlp/bode-7b-alpaca-pt-br-gguf"
+MODEL_FILE = "bode-7b-alpaca-q8_0.gguf"
+MODEL_TYPE = 'llama'
+
+# tamanho da janela de contexto (prompt + resposta) e limite de tokens gerados;
+# sem configuração, o ctransformers usa um contexto de apenas 512 tokens
+CONTEXT_LENGTH = int(os.environ.get('ANALISADOR_LLM_CONTEXT', '2048'))
+MAX_NEW_TOKENS = int(os.environ.get('ANALISADOR_LLM_MAX_NEW_TOKENS', '256'))
+
+# número de contextos de geração que podem rodar em paralelo
+POOL_SIZE = max(1, int(os.environ.get('ANALISADOR_LLM_INSTANCES', '1')))
+
+_llms = {}
+_chains = {}
+_last_used = 0.0
+_lock = threading.RLock()
+_idle_thread = None
+
+def model_version(template, *params):
+    """ Identifica o modelo, o prompt e os parâmetros que produziram um resultado (para chaves de cache) """
+    return ":".join([MODEL_REPO, MODEL_FILE, content_hash(template)[:12]] + [str(p) for p in params])
+
+_free_slots = queue.Queue()
+for _slot in range(POOL_SIZE):
+    _free_slots.put(_slot)
+
+def get_llm(slot=0):
+    """ Retorna a instância do modelo, carregando os pesos no primeiro uso.
+
+    Sumarização e perguntas compartilham essa instância, então o processo
+    mantém apenas uma cópia do modelo na memória. Com ANALISADOR_LLM_INSTANCES
+    maior que 1, cada slot tem seu próprio contexto de geração; como o GGUF é
+    mapeado em memória (mmap), os pesos continuam compartilhados entre eles.
+    """
+    global _last_used
+
+    with _lock:
+        if slot not in _llms:
+            _llms[slot] = CTransformers(
+                model=MODEL_REPO,
+                model_file=MODEL_FILE,
+                model_type=MODEL_TYPE,
+                config={'context_length': CONTEXT_LENGTH, 'max_new_tokens': MAX_NEW_TOKENS}
+            )
+        _last_used = time.monotonic()
+        return _llms[slot]
+
+def get_chain(template, input_variables=("instruction",), slot=0):
+    """ Retorna uma LLMChain com o prompt informado sobre o modelo compartilhado """
+    with _lock:
+        llm = get_llm(slot)
+        chain = _chains.get((template, slot))
+
+        if chain is None or chain.llm is not llm:
+            prompt = PromptTemplate(template=template, input_variables=list(input_variables))
+            chain = LLMChain(prompt=prompt, llm=llm)
+            _chains[(template, slot)] = chain
+
+        return chain
+
+@contextmanager
+def acquire_slot():
+    """ Reserva um contexto de geração livre durante o bloco with.
+
+    Um mesmo contexto não pode gerar duas respostas ao mesmo tempo, então
+    chamadas concorrentes (de várias sessões ou de um pool de workers)
+    aguardam até que um slot seja liberado.
+    """
+    global _last_used
+
+    slot = _free_slots.get()
+    try:
+        yield slot
+    finally:
+        # uma geração longa conta como uso até terminar
+        _last_used = time.monotonic()
+        _free_slots.put(slot)
+
+@contextmanager
+def acquire_chain(template, input_variables=("instruction",)):
+    """ Reserva um contexto livre e retorna a LLMChain do prompt sobre ele """
+    with acquire_slot() as slot:
+        yield get_chain(template, input_variables, slot)
+
+class StreamStats:
+    """ Tempos de uma geração em streaming.
+
+    ttft (time to first token) é o tempo até o primeiro token, que é a
+    latência percebida pelo usuário; total_time inclui a geração completa.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.tokens = 0
+
+    def record(self):
+        """ Registra a chegada de um token """
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    @property
+    def ttft(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def total_time(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started
+
+    @property
+    def tokens_per_second(self):
+        if self.first_token_at is None or self.tokens < 2:
+            return None
+        return (self.tokens - 1) / (self.total_time - self.ttft)
+
+def stream_completion(template, stats=None, **variables):
+    """ Gera a resposta do modelo token a token para o prompt preenchido.
+
+    Os tokens são repassados assim que o modelo os produz; se stats (um
+    StreamStats) for informado, registra o tempo até o primeiro token e a
+    taxa de geração.
+    """
+    prompt = PromptTemplate(template=template, input_variables=list(variables)).format(**variables)
+
+    with acquire_slot() as slot:
+        llm = get_llm(slot)
+
+        # llm.client é o modelo do ctransformers, que suporta stream=True
+        for token in llm.client(prompt, stream=True):
+            if stats is not None:
+                stats.record()
+            yield token
+
+    if stats is not None:
+        stats.finished_at = time.perf_counter()
+
+def is_loaded():
+    """ Indica se os pesos estão carregados na memória """
+    return bool(_llms)
+
+def warm_up(background=True):
+    """ Carrega o modelo antecipadamente, por exemplo na inicialização do servidor """
+    if background:
+        threading.Thread(target=get_llm, name="llm-warmup", daemon=True).start()
+    else:
+        get_llm()
+
+def unload():
+    """ Libera o modelo da memória; o próximo uso carrega novamente """
+    with _lock:
+        _llms.clear()
+        _chains.clear()
+    gc.collect()
+
+def start_idle_unloader(idle_seconds, check_interval=60):
+    """ Libera o modelo automaticamente após idle_seconds sem uso.
+
+    Enquanto algum contexto estiver reservado (uma geração em andamento), o
+    modelo nunca é liberado: outra chamada carregaria uma segunda cópia
+    enquanto a primeira ainda está em uso.
+    """
+    global _idle_thread
+
+    def watch():
+        while True:
+            time.sleep(min(check_interval, idle_seconds))
+            with _lock:
+                in_use = _free_slots.qsize() < POOL_SIZE
+                if _llms and not in_use and time.monotonic() - _last_used > idle_seconds:
+                    unload()
+
+    with _lock:
+        if _idle_thread is None:
+            _idle_thread = threading.Thread(target=watch, name="llm-idle-unloader", daemon=True)
+            _idle_thread.start()
+
+def configure_from_env():
+    """ Aplica a configuração das variáveis de ambiente:
+    ANALISADOR_LLM_WARMUP=1 pré-carrega o modelo e ANALISADOR_LLM_IDLE_TIMEOUT
+    (em segundos) libera o modelo após esse tempo sem uso.
+    """
+    if os.environ.get('ANALISADOR_LLM_WARMUP') == '1':
+        warm_up()
+
+    idle_timeout = os.environ.get('ANALISADOR_LLM_IDLE_TIMEOUT')
+    if idle_timeout:
+        start_idle_unloader(float(idle_timeout))
@@ -0,0 +1,50 @@
+from .registry import get_llm, CONTEXT_LENGTH, MAX_NEW_TOKENS
+
+# caracteres por token do tokenizador LLaMA, com folga: o vocabulário é
+# centrado no inglês, e em português a média fica abaixo de 3,5
+CHARS_PER_TOKEN = 3.0
+# nenhum token do vocabulário cobre mais caracteres que isso
+MAX_CHARS_PER_TOKEN = 16
+
+def approx_token_count(text):
+    """ Estimativa rápida do número de tokens, sem carregar o tokenizador.
+
+    Serve para pré-filtrar e dividir textos; para decidir um corte exato use
+    count_tokens ou truncate_to_tokens.
+    """
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+def prompt_budget(template, **variables):
+    """ Tokens disponíveis para o conteúdo variável de um prompt: o contexto do
+    modelo menos a resposta e o texto fixo do template (estimado com as
+    variáveis informadas, normalmente vazias).
+    """
+    return CONTEXT_LENGTH - MAX_NEW_TOKENS - approx_token_count(template.format(**variables))
+
+def _tokenizer():
+    """ Modelo do ctransformers em uso, cujo tokenizador é o do próprio GGUF """
+    return get_llm().client
+
+def count_tokens(text):
+    """ Número exato de tokens do texto no vocabulário do modelo servido """
+    return len(_tokenizer().tokenize(text))
+
+def truncate_to_tokens(text, max_tokens):
+    """ Trunca o texto para caber em max_tokens tokens do modelo servido.
+
+    Com o byte fallback do SentencePiece cada token cobre pelo menos um byte,
+    então textos com até max_tokens bytes são devolvidos sem tokenizar. Textos
+    muito maiores são pré-cortados antes da tokenização exata, que assim
+    nunca processa mais que max_tokens * MAX_CHARS_PER_TOKEN caracteres.
+    """
+    if len(text.encode('utf-8')) <= max_tokens:
+        return text
+
+    text = text[:max_tokens * MAX_CHARS_PER_TOKEN]
+
+    tokenizer = _tokenizer()
+    tokens = tokenizer.tokenize(text)
+    if len(tokens) <= max_tokens:
+        return text
+
+    return tokenizer.detokenize(tokens[:max_tokens])
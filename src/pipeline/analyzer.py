@@ -0,0 +1,161 @@
+from dataclasses import dataclass, field
+from collections import Counter
+import hashlib
+import pandas as pd
+
+from ..preprocessing.tokenizer import tokenize_text, word_counter
+from ..preprocessing.stream import CHUNK_SIZE, iter_decoded_chunks, iter_token_batches
+from ..analysis.statistics import calculate_metrics, calculate_tfidf_from_counts
+from ..analysis.tfidf import IdfModel, top_k_indices
+from ..cache.lru import content_hash
+
+ENCODINGS = ('utf-8', 'latin-1', 'cp1252')
+TOP_K_TERMS = 15
+PAGE_KEYWORDS = 5
+
+
+@dataclass
+class AnalysisResult:
+    """ Resultado da análise de um texto.
+
+    Na análise em streaming a lista de tokens não é mantida (tokens é None).
+    df_tfidf guarda apenas os termos mais relevantes; a tabela completa é
+    calculada sob demanda por tfidf_table(). doc_hash identifica o documento
+    nos caches das etapas seguintes (representação, classificação etc.).
+    Em documentos paginados (PDF), pages traz, para cada página, o número de
+    tokens e as palavras-chave.
+    """
+    tokens: list
+    word_counts: Counter
+    metrics: dict
+    df_tfidf: pd.DataFrame
+    doc_hash: str = None
+    idf_model: object = field(default=None, repr=False)
+    pages: list = None
+
+    def tfidf_table(self):
+        """ Tabela TF-IDF com todo o vocabulário do documento """
+        return calculate_tfidf_from_counts(self.word_counts, self.idf_model)
+
+
+def read_source(source):
+    """ Obtém o texto a partir de uma string ou de um objeto do tipo arquivo
+    (modo texto ou binário), sem passar pelo disco.
+    """
+    if isinstance(source, str):
+        return source
+
+    content = source.read()
+    if isinstance(content, str):
+        return content
+
+    for encoding in ENCODINGS:
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+
+    raise ValueError("Não foi possível decodificar o arquivo com nenhuma codificação suportada.")
+
+
+def analyze(source, idf_model=None):
+    """ Executa a análise completa em memória: limpeza e tokenização (em uma
+    única passada), contagem, métricas e TF-IDF (ponderado por idf_model, se
+    informado).
+
+    Não lê nem grava arquivos e não depende de estado global mutável, então
+    pode ser chamada por várias sessões ao mesmo tempo.
+    """
+    text = read_source(source)
+
+    tokens = tokenize_text(text)
+    word_counts = word_counter(tokens)
+    metrics = calculate_metrics(word_counts)
+    df_tfidf = calculate_tfidf_from_counts(word_counts, idf_model, top_k=TOP_K_TERMS)
+
+    return AnalysisResult(tokens, word_counts, metrics, df_tfidf, content_hash(text), idf_model)
+
+
+def analyze_batches(batches, idf_model=None, doc_hash=None):
+    """ Consome lotes de tokens atualizando apenas contadores incrementais.
+
+    A memória usada depende do tamanho do vocabulário, e não do tamanho do
+    documento.
+    """
+    word_counts = Counter()
+    for batch in batches:
+        word_counts.update(batch)
+
+    metrics = calculate_metrics(word_counts)
+    df_tfidf = calculate_tfidf_from_counts(word_counts, idf_model, top_k=TOP_K_TERMS)
+
+    return AnalysisResult(None, word_counts, metrics, df_tfidf, doc_hash, idf_model)
+
+
+def page_keywords(page_counts, idf_model, k=PAGE_KEYWORDS):
+    """ Os k termos de maior TF-IDF de uma página """
+    termos = {termo: contagem for termo, contagem in page_counts.items() if len(termo) > 1}
+    if not termos:
+        return []
+
+    terms, scores = idf_model.transform(termos)
+    return terms[top_k_indices(scores, k, terms)].tolist()
+
+
+def analyze_pages(pages, idf_model=None, keywords_per_page=PAGE_KEYWORDS):
+    """ Analisa um documento página a página, a partir de pares (número, texto).
+
+    Cada página é tokenizada e somada às contagens do documento assim que é
+    recebida, então o texto completo nunca é montado. Além do resultado
+    usual, registra o número de tokens e as palavras-chave de cada página.
+    As palavras-chave usam idf_model; sem ele, cada página é tratada como um
+    documento e o IDF é calculado entre as páginas, destacando os termos
+    característicos de cada uma.
+    """
+    word_counts = Counter()
+    digest = hashlib.sha256()
+    page_counts = []
+
+    for page_number, text in pages:
+        digest.update(text.encode('utf-8') + b'\f')
+        counts = Counter(tokenize_text(text))
+        word_counts.update(counts)
+        page_counts.append((page_number, counts))
+
+    keyword_model = idf_model
+    if keyword_model is None:
+        keyword_model = IdfModel().partial_fit(counts.keys() for _, counts in page_counts)
+
+    page_info = [
+        {
+            "pagina": page_number,
+            "n_tokens": sum(counts.values()),
+            "palavras_chave": page_keywords(counts, keyword_model, keywords_per_page)
+        }
+        for page_number, counts in page_counts
+    ]
+
+    metrics = calculate_metrics(word_counts)
+    df_tfidf = calculate_tfidf_from_counts(word_counts, idf_model, top_k=TOP_K_TERMS)
+
+    return AnalysisResult(None, word_counts, metrics, df_tfidf, digest.hexdigest(), idf_model, page_info)
+
+
+def analyze_stream(file, chunk_size=CHUNK_SIZE, idf_model=None):
+    """ Analisa um arquivo binário bloco a bloco, sem carregá-lo inteiro na memória.
+
+    Se o arquivo não puder ser decodificado, a leitura recomeça do início com
+    a próxima codificação suportada.
+    """
+    for encoding in ENCODINGS:
+        try:
+            file.seek(0)
+            digest = hashlib.sha256()
+            chunks = iter_decoded_chunks(file, chunk_size, encoding, digest=digest)
+            result = analyze_batches(iter_token_batches(chunks), idf_model)
+            result.doc_hash = digest.hexdigest()
+            return result
+        except UnicodeDecodeError:
+            continue
+
+    raise ValueError("Não foi possível decodificar o arquivo com nenhuma codificação suportada.")
@@ -0,0 +1,107 @@
+import re
+from collections import Counter
+
+from ..preprocessing.tokenizer import tokenize_text
+from ..analysis.statistics import WordLengthStats, calculate_tfidf_from_counts
+from ..cache.lru import LRUCache, content_hash
+from .analyzer import AnalysisResult, TOP_K_TERMS
+
+# linhas em branco separam parágrafos; nenhuma palavra atravessa esse limite
+_PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
+
+def split_paragraphs(text):
+    """ Divide o texto em parágrafos (trechos separados por linhas em branco) """
+    return [paragrafo for paragrafo in _PARAGRAPH_BOUNDARY.split(text) if paragrafo.strip()]
+
+
+class _Paragraph:
+    """ Contagem de palavras e estatísticas de tamanho de um parágrafo """
+
+    __slots__ = ('word_counts', 'stats')
+
+    def __init__(self, text):
+        self.word_counts = Counter(tokenize_text(text))
+        self.stats = WordLengthStats().update_counts(self.word_counts)
+
+
+class IncrementalAnalyzer:
+    """ Reanálise incremental de um texto que é editado aos poucos.
+
+    Cada parágrafo é identificado pelo hash do seu conteúdo. A cada chamada
+    de analyze, apenas os parágrafos novos ou alterados são tokenizados; as
+    contagens e o histograma de tamanhos dos parágrafos removidos são
+    subtraídos dos totais do documento e os dos novos são somados. Parágrafos
+    repetidos são contados por referência. Editar um parágrafo de um texto
+    longo custa, além da divisão e do hash dos parágrafos, apenas o trabalho
+    proporcional ao parágrafo editado e o TF-IDF sobre o vocabulário.
+
+    Os parágrafos removidos continuam em um cache limitado (cache_size), então
+    desfazer uma edição também não exige retokenizar.
+    """
+
+    def __init__(self, idf_model=None, cache_size=1024):
+        self.idf_model = idf_model
+        self.word_counts = Counter()
+        self.stats = WordLengthStats()
+        self._present = Counter()  # hash do parágrafo -> ocorrências no texto atual
+        self._paragraphs = {}  # hash -> _Paragraph, para os parágrafos presentes
+        self._removed = LRUCache(cache_size)
+
+    def _get_paragraph(self, key, text):
+        paragraph = self._paragraphs.get(key) or self._removed.get(key)
+        if paragraph is None:
+            paragraph = _Paragraph(text)
+        self._paragraphs[key] = paragraph
+        return paragraph
+
+    def _add(self, paragraph, times):
+        for _ in range(times):
+            self.word_counts.update(paragraph.word_counts)
+            self.stats.merge(paragraph.stats)
+
+    def _remove(self, paragraph, times):
+        for _ in range(times):
+            self.word_counts.subtract(paragraph.word_counts)
+            self.stats.subtract(paragraph.stats)
+
+        # descarta as palavras que deixaram de aparecer
+        for word in paragraph.word_counts:
+            if self.word_counts[word] <= 0:
+                del self.word_counts[word]
+
+    def update(self, text):
+        """ Atualiza os totais para a nova versão do texto """
+        textos = {}
+        present = Counter()
+        for paragrafo in split_paragraphs(text):
+            key = content_hash(paragrafo)
+            textos[key] = paragrafo
+            present[key] += 1
+
+        for key in self._present.keys() | present.keys():
+            diff = present[key] - self._present[key]
+            if diff > 0:
+                self._add(self._get_paragraph(key, textos[key]), diff)
+            elif diff < 0:
+                self._remove(self._paragraphs[key], -diff)
+
+            if not present[key] and key in self._paragraphs:
+                self._removed.set(key, self._paragraphs.pop(key))
+
+        self._present = present
+        return self
+
+    def analyze(self, text):
+        """ Atualiza os totais e retorna o resultado no mesmo formato de analyze().
+
+        Assim como na análise em streaming, a lista de tokens não é mantida
+        (tokens é None).
+        """
+        self.update(text)
+
+        word_counts = Counter(self.word_counts)
+        metrics = self.stats.to_metrics()
+        df_tfidf = calculate_tfidf_from_counts(word_counts, self.idf_model, top_k=TOP_K_TERMS)
+
+        return AnalysisResult(None, word_counts, metrics, df_tfidf, content_hash(text), self.idf_model)
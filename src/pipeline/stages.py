@@ -0,0 +1,49 @@
+import numpy as np
+from scipy import sparse
+
+from ..cache.lru import LRUCache
+from ..representation.bag_of_words import build_vocabulary, cooccurrence_matrix
+
+# resultados das etapas por documento (chave: hash do documento + parâmetros)
+_stage_cache = LRUCache(maxsize=32)
+
+def _cached(result, key, compute):
+    """ Resultado de uma etapa no cache do documento; sem doc_hash não há como
+    identificar o documento, então a etapa é calculada sem cache
+    """
+    if result.doc_hash is None:
+        return compute()
+    return _stage_cache.get_or_compute((result.doc_hash,) + key, compute)
+
+def _document_tokens(result, load_tokens):
+    if result.tokens is not None:
+        return result.tokens
+    if load_tokens is None:
+        raise ValueError("A análise em streaming não guarda os tokens; informe load_tokens.")
+    return load_tokens()
+
+def token_ids(result, load_tokens=None):
+    """ Vocabulário e ids dos tokens do documento, calculados uma única vez.
+
+    As etapas de representação reutilizam esses arrays em vez de refazer a
+    separação do texto. Para resultados em streaming (sem tokens), load_tokens
+    é chamado apenas se os ids ainda não estiverem no cache.
+    """
+    return _cached(result, ('token_ids',), lambda: build_vocabulary(_document_tokens(result, load_tokens)))
+
+def bow_stage(result, load_tokens=None):
+    """ Bag of Words do documento (matriz esparsa 1 x V) e o vocabulário """
+    def compute():
+        vocabulary, ids = token_ids(result, load_tokens)
+        counts = np.bincount(ids[ids >= 0], minlength=len(vocabulary))
+        return sparse.csr_matrix(counts.reshape(1, -1)), vocabulary
+
+    return _cached(result, ('bow',), compute)
+
+def cooccurrence_stage(result, window_size=2, weighting=None, load_tokens=None):
+    """ Matriz esparsa de coocorrência do documento e o vocabulário """
+    def compute():
+        vocabulary, ids = token_ids(result, load_tokens)
+        return cooccurrence_matrix(ids, len(vocabulary), window_size, weighting), vocabulary
+
+    return _cached(result, ('cooccurrence', window_size, weighting), compute)
@@ -12,12 +12,15 @@ def read_txt():
     return text
     
 
-def clean_text():
+def clean_text(txt=None):
     """ Limpeza de texto, incluindo remoção de pontuações,
     caracteres especiais, números, conversão de letras de maiúsculas para minúsculas,
     correções ortográficas
+
+    Se nenhum texto for informado, lê o arquivo de teste em data/teste.txt.
     """
-    txt = read_txt()
+    if txt is None:
+        txt = read_txt()
     txt = txt.lower() # conversão para minúsculas
     txt = re.sub(r'[^\w\s]', '', txt) # remove pontuações e caracteres especiais
     txt = re.sub(r'\d', '', txt) # remove números
@@ -0,0 +1,7 @@
+import re
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+def split_sentences(texto):
+    """ Divide o texto em frases, nos sinais de pontuação final e quebras de parágrafo """
+    return [frase.strip() for frase in _SENTENCE_BOUNDARY.split(texto) if frase.strip()]
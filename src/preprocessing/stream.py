@@ -0,0 +1,58 @@
+import codecs
+from .tokenizer import tokenize_text, _WORD_CHAR
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+def iter_decoded_chunks(file, chunk_size=CHUNK_SIZE, encoding='utf-8', errors='strict', digest=None):
+    """ Lê um arquivo binário em blocos e decodifica cada bloco.
+
+    O decodificador incremental guarda os bytes de um caractere multibyte
+    que ficou dividido entre dois blocos e os completa na leitura seguinte.
+    Se digest (um objeto do hashlib) for informado, é atualizado com os bytes
+    lidos, permitindo calcular o hash do arquivo na mesma passada.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        if digest is not None:
+            digest.update(data)
+
+        text = decoder.decode(data)
+        if text:
+            yield text
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def _split_partial_word(text):
+    """ Separa a palavra possivelmente incompleta no fim do bloco (incluindo
+    acentos combinantes, que completam a letra anterior)
+    """
+    cut = len(text)
+    while cut > 0 and _WORD_CHAR.match(text, cut - 1):
+        cut -= 1
+
+    return text[:cut], text[cut:]
+
+def iter_token_batches(chunks):
+    """ Gera um lote de tokens para cada bloco de texto.
+
+    A palavra que termina no limite de um bloco é guardada e concatenada ao
+    início do bloco seguinte, então nenhuma palavra é cortada ao meio.
+    """
+    pending = ''
+
+    for chunk in chunks:
+        complete, pending = _split_partial_word(pending + chunk)
+        batch = tokenize_text(complete)
+        if batch:
+            yield batch
+
+    if pending:
+        batch = tokenize_text(pending)
+        if batch:
+            yield batch
@@ -1,22 +1,68 @@
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
+import os
+import re
+import threading
+import unicodedata
 from collections import Counter
 from .cleaner import clean_text
-nltk.download('stopwords')
-stopwords = nltk.corpus.stopwords.words('portuguese')
 
-text = clean_text()
+STOPWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopwords_pt.txt')
+
+# sequência de letras (sem dígitos, pontuação ou espaços)
+_TOKEN_PATTERN = re.compile(r'[^\W\d]+')
+# caractere que pode fazer parte de uma palavra: letra ou acento combinante
+# (texto em NFD, comum na saída de PDFs e em textos colados do macOS)
+_WORD_CHAR = re.compile(r'[^\W\d]|[\u0300-\u036f]')
+
+_stopwords = None
+_stopwords_lock = threading.Lock()
+
+def get_stopwords():
+    """ Retorna as palavras de parada em português.
+
+    A lista (a mesma do corpus 'stopwords' do NLTK) é distribuída junto com o
+    projeto, então não há download nem acesso à rede. O arquivo é lido apenas
+    uma vez por processo, no primeiro uso, e guardado em um frozenset para
+    que a verificação de cada token seja O(1).
+    """
+    global _stopwords
+
+    if _stopwords is None:
+        with _stopwords_lock:
+            if _stopwords is None:
+                with open(STOPWORDS_PATH, encoding='utf-8') as f:
+                    _stopwords = frozenset(line.strip() for line in f if line.strip())
+
+    return _stopwords
 
 def tokenizer(text):
     """ Tokenização para dividir um texto em unidades menores e remoção
      de palavras de parada """
-    
+    from nltk.tokenize import word_tokenize
+
+    stopwords = get_stopwords()
     tokens = word_tokenize(text)
     tokens = [x for x in tokens if x not in stopwords]
     
     return tokens
 
+def tokenize_text(text):
+    """ Normalização e tokenização em uma única passada sobre o texto.
+
+    Substitui clean_text + tokenizer: extrai as sequências de letras com um
+    padrão pré-compilado (descartando pontuação e números), converte cada uma
+    para minúsculas e remove as palavras de parada. Pontuação dentro de uma
+    palavra passa a separar tokens ("guarda-chuva" vira "guarda" e "chuva").
+    O texto é normalizado para NFC antes, para que letras acentuadas
+    decompostas (NFD) não dividam as palavras.
+    """
+    stopwords = get_stopwords()
+    text = unicodedata.normalize('NFC', text)
+
+    return [
+        token for token in map(str.lower, _TOKEN_PATTERN.findall(text))
+        if token not in stopwords
+    ]
+
 def word_counter(tokens):
    """ Contagem de frequência de palavras importantes
    """
@@ -25,6 +71,5 @@ def word_counter(tokens):
 
 if __name__ == '__main__':
     
-    print(tokenizer(text))
+    print(tokenizer(clean_text()))
     
-
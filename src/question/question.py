@@ -1,52 +1,83 @@
-import streamlit as st
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.llms import CTransformers
-from transformers import AutoTokenizer
+from ..llm.registry import get_chain, acquire_chain, stream_completion, model_version
+from ..cache.results import ResultCache
+from ..llm.tokens import approx_token_count, truncate_to_tokens, prompt_budget
+from .retrieval import retrieve
 
-tokenizer = AutoTokenizer.from_pretrained("gpt2") # conta os tokens
+QA_TEMPLATE = """Abaixo está uma instrução que descreve uma tarefa, junto com trechos de um texto. Escreva uma resposta que complete adequadamente o pedido.
 
-# carregamento com cache para economizar recursos
-@st.cache_resource
-def load_model():
-    """Carrega o modelo usado e personaliza o prompt."""
+    ### Instrução:
+    Com base nos trechos abaixo, responda de forma direta à pergunta:
 
-    template = """Abaixo está uma instrução que descreve uma tarefa. Escreva uma resposta que complete adequadamente o pedido.
+    "{question}"
 
-    ### Instrução:
-    De acordo com o texto fornecido, responda de forma direta à pergunta especificada:
+    ### Trechos:
+    {context}
+
+    ### Resposta:"""
 
-    "{instruction}"
+TOP_PASSAGES = 3
+# tokens para os trechos: o contexto do modelo menos o prompt e a resposta
+CONTEXT_TOKENS = prompt_budget(QA_TEMPLATE, question="", context="")
 
-    ### Resumo:"""
+# respostas por documento e pergunta
+_answers = ResultCache("resposta", model_version(QA_TEMPLATE, TOP_PASSAGES, CONTEXT_TOKENS))
 
-    prompt = PromptTemplate(template=template, input_variables=["instruction"])
-    llm = CTransformers(
-        model="recogna-nlp/bode-7b-alpaca-pt-br-gguf",
-        model_file="bode-7b-alpaca-q8_0.gguf",
-        model_type='llama'
-    )
-    return LLMChain(prompt=prompt, llm=llm)
+def load_model():
+    """Retorna a cadeia com o prompt desta tarefa sobre o modelo compartilhado."""
+    return get_chain(QA_TEMPLATE, ("context", "question"))
 
 def truncate_text(text, max_tokens=512):
-    """Trunca o texto para não exceder o número máximo de tokens."""
-    tokens = tokenizer.encode(text)
-    if len(tokens) <= max_tokens:
-        return text
-    
-    # trunca os tokens e converte de volta para texto
-    truncated_tokens = tokens[:max_tokens]
-    truncated_text = tokenizer.decode(truncated_tokens)
-    return truncated_text
+    """Trunca o texto para não exceder o número máximo de tokens do modelo usado."""
+    return truncate_to_tokens(text, max_tokens)
+
+def build_context(text_input, question, top_k=TOP_PASSAGES, max_tokens=CONTEXT_TOKENS):
+    """Seleciona os trechos do documento mais relevantes para a pergunta.
+
+    O documento é indexado (BM25) apenas na primeira pergunta; as seguintes
+    custam só a busca. Sem nenhum termo em comum, usa o início do texto. Os
+    trechos são truncados ao que sobra de max_tokens depois da pergunta.
+    """
+    passages = [passage for passage, _ in retrieve(text_input, question, top_k)]
+    context = "\n\n".join(passages) if passages else text_input
+
+    return truncate_text(context, max_tokens=max(1, max_tokens - approx_token_count(question)))
 
-def answer_question(text_input):
-    """Função de responder perguntas específicas sobre o texto enviado pelo usuário."""
+def answer_question(text_input, question):
+    """Função de responder perguntas específicas sobre o texto enviado pelo usuário.
 
-    truncated_text = truncate_text(text_input, max_tokens=512)
+    Apenas os trechos recuperados e a pergunta são enviados ao modelo, então
+    qualquer parte do documento pode ser consultada. A mesma pergunta sobre o
+    mesmo documento é respondida direto do cache.
+    """
+
+    def compute():
+        context = build_context(text_input, question)
+        with acquire_chain(QA_TEMPLATE, ("context", "question")) as llm_chain:
+            return llm_chain.run(context=context, question=question)
 
     try:
-        llm_chain = load_model()
-        answer = llm_chain.run(truncated_text)
-        return answer
+        return _answers.get_or_compute(_answers.key(text_input, question), compute)
+    except Exception as e:
+        return f"Desculpe, ocorreu um erro ao gerar a resposta: {str(e)}"
+
+def answer_question_stream(text_input, question, stats=None):
+    """Versão em streaming de answer_question: a resposta é gerada token a token."""
+
+    try:
+        chave = _answers.key(text_input, question)
+        answer = _answers.get(chave)
+        if answer is not None:
+            if stats is not None:
+                stats.record()
+            yield answer
+            return
+
+        context = build_context(text_input, question)
+        partes = []
+        for token in stream_completion(QA_TEMPLATE, stats, context=context, question=question):
+            partes.append(token)
+            yield token
+
+        _answers.set(chave, "".join(partes))
     except Exception as e:
-        return f"Desculpe, ocorreu um erro ao gerar o resumo: {str(e)}"
\ No newline at end of file
+        yield f"Desculpe, ocorreu um erro ao gerar a resposta: {str(e)}"
@@ -0,0 +1,97 @@
+import numpy as np
+from scipy import sparse
+
+from ..cache.lru import LRUCache, content_hash
+from ..preprocessing.sentences import split_sentences
+from ..preprocessing.tokenizer import tokenize_text
+
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 1  # frases repetidas entre trechos vizinhos
+
+# índices por documento (chave: hash do texto)
+_indexes = LRUCache(maxsize=16)
+
+def split_passages(texto, max_words=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """ Divide o texto em trechos de até max_words palavras, nas fronteiras das
+    frases, repetindo as últimas `overlap` frases no início do trecho seguinte.
+
+    Frases maiores que o trecho (por exemplo, tabelas ou listas sem
+    pontuação) são divididas por palavras.
+    """
+    frases = []
+    for frase in split_sentences(texto):
+        palavras = frase.split()
+        if len(palavras) > max_words:
+            frases.extend(" ".join(palavras[i:i + max_words]) for i in range(0, len(palavras), max_words))
+        else:
+            frases.append(frase)
+
+    trechos = []
+    inicio = 0
+
+    while inicio < len(frases):
+        fim = inicio
+        tamanho = 0
+        while fim < len(frases) and (fim == inicio or tamanho + len(frases[fim].split()) <= max_words):
+            tamanho += len(frases[fim].split())
+            fim += 1
+
+        trechos.append(" ".join(frases[inicio:fim]))
+        if fim >= len(frases):
+            break
+        inicio = max(inicio + 1, fim - overlap)
+
+    return trechos
+
+class BM25Index:
+    """ Índice BM25 dos trechos de um documento.
+
+    Os pesos BM25 de cada par (trecho, termo) são calculados uma única vez e
+    guardados em uma matriz esparsa; buscar uma pergunta é somar as colunas
+    dos termos da pergunta.
+    """
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = passages
+
+        vocabulary = {}
+        rows, cols = [], []
+        for i, passage in enumerate(passages):
+            for token in tokenize_text(passage):
+                rows.append(i)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+
+        self.vocabulary = vocabulary
+        shape = (len(passages), len(vocabulary))
+        tf = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=shape).tocsr()
+
+        lengths = np.asarray(tf.sum(axis=1)).ravel()
+        avg_length = lengths.mean() if len(lengths) and lengths.mean() else 1.0
+        df = np.bincount(tf.indices, minlength=len(vocabulary))
+        idf = np.log(1 + (len(passages) - df + 0.5) / (df + 0.5))
+
+        # peso BM25 = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * tamanho / média))
+        norm = np.repeat(k1 * (1 - b + b * lengths / avg_length), np.diff(tf.indptr))
+        tf.data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + norm)
+        self.weights = tf.tocsc()
+
+    def search(self, query, k=3):
+        """ Retorna os k trechos mais relevantes para a pergunta, em ordem de relevância """
+        ids = [self.vocabulary[t] for t in set(tokenize_text(query)) if t in self.vocabulary]
+        if not ids or not self.passages:
+            return []
+
+        scores = np.asarray(self.weights[:, ids].sum(axis=1)).ravel()
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        return [(self.passages[i], float(scores[i])) for i in best if scores[i] > 0]
+
+def get_index(texto):
+    """ Índice do documento, construído uma única vez e reutilizado nas perguntas seguintes """
+    return _indexes.get_or_compute(content_hash(texto), lambda: BM25Index(split_passages(texto)))
+
+def retrieve(texto, pergunta, k=3):
+    """ Trechos do documento mais relevantes para a pergunta """
+    return get_index(texto).search(pergunta, k)
@@ -1,60 +1,192 @@
-from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from scipy import sparse
 import numpy as np
+import joblib
+import re
 
-def bow(tokens):
+# mesmo critério do token_pattern padrão do CountVectorizer
+_VOCAB_PATTERN = re.compile(r'\w\w+')
+
+def bow(tokens, vectorizer=None, dense=False):
     """
     Gera a representação Bag of Words (BoW) a partir de uma lista de documentos.
 
+    A matriz permanece esparsa (CSR) por padrão. Se um vectorizer já treinado
+    for informado (por exemplo, carregado com load_vectorizer), os documentos
+    são apenas transformados, sem reajustar o vocabulário.
+
     Parâmetros:
         tokens (list of str): Lista de sentenças/documentos em formato de strings.
+        vectorizer (CountVectorizer ou HashingVectorizer, opcional): Vetorizador já treinado.
+        dense (bool): Se True, retorna a matriz densa (numpy.ndarray).
 
     Retorna:
         tuple: Uma tupla contendo:
-            - array BoW (numpy.ndarray): Matriz onde cada linha representa um documento 
+            - matriz BoW (scipy.sparse.csr_matrix): Matriz onde cada linha representa um documento 
               e cada coluna representa a frequência de uma palavra.
             - vectorizer (CountVectorizer): O vetor de características treinado.
     """
-    vectorizer = CountVectorizer()
-    x = vectorizer.fit_transform(tokens)
-    return x.toarray(), vectorizer
+    if vectorizer is None:
+        vectorizer = CountVectorizer(dtype=np.int32)
+        x = vectorizer.fit_transform(tokens)
+    else:
+        x = vectorizer.transform(tokens)
 
-def cooccurrence(tokens, window_size=2):
+    x = x.tocsr()
+    return (x.toarray() if dense else x), vectorizer
+
+def fit_bow(documents, **kwargs):
     """
-    Calcula a matriz de coocorrência de palavras com base em uma janela de contexto deslizante.
+    Treina uma única vez o vocabulário do BoW para ser reutilizado com bow(..., vectorizer=...).
+
+    Parâmetros:
+        documents (iterable of str): Documentos usados para aprender o vocabulário.
+        **kwargs: Parâmetros repassados ao CountVectorizer.
+
+    Retorna:
+        CountVectorizer: O vetor de características treinado.
+    """
+    kwargs.setdefault('dtype', np.int32)
+    return CountVectorizer(**kwargs).fit(documents)
+
+def save_vectorizer(vectorizer, path):
+    """
+    Salva um vetorizador treinado para ser compartilhado entre processos.
+
+    Parâmetros:
+        vectorizer (CountVectorizer): O vetor de características treinado.
+        path (str): Caminho do arquivo de destino.
+    """
+    joblib.dump(vectorizer, path)
+
+def load_vectorizer(path):
+    """
+    Carrega um vetorizador salvo com save_vectorizer.
+
+    Parâmetros:
+        path (str): Caminho do arquivo salvo.
+
+    Retorna:
+        CountVectorizer: O vetor de características treinado.
+    """
+    return joblib.load(path)
+
+def hashing_bow(tokens, n_features=2 ** 20):
+    """
+    Gera um BoW sem estado com o HashingVectorizer, para vocabulários ilimitados.
+
+    Nenhum vocabulário é guardado em memória: cada termo é mapeado para uma
+    coluna por hashing, então qualquer processo gera as mesmas colunas sem
+    treinamento prévio (em troca, não é possível recuperar os termos).
 
     Parâmetros:
         tokens (list of str): Lista de sentenças/documentos em formato de strings.
-        window_size (int): Tamanho da janela de contexto para considerar palavras vizinhas.
+        n_features (int): Número de colunas da matriz.
 
     Retorna:
-        numpy.ndarray: Matriz quadrada de coocorrência onde cada célula (i, j) representa
-        quantas vezes a palavra i apareceu no contexto da palavra j.
+        tuple: Uma tupla contendo:
+            - matriz BoW (scipy.sparse.csr_matrix): Contagens por documento.
+            - vectorizer (HashingVectorizer): O vetorizador usado.
     """
-    _, vectorizer = bow(tokens)
+    vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None, dtype=np.float32)
+    return vectorizer.transform(tokens).tocsr(), vectorizer
 
-    vocab = vectorizer.get_feature_names_out()
-    vocab_size = len(vocab)
+def build_vocabulary(tokens):
+    """
+    Mapeia cada token para um id inteiro em uma única passada.
 
-    ccr = np.zeros((vocab_size, vocab_size), dtype=np.int32)
+    Assim como o CountVectorizer, os tokens são convertidos para minúsculas e
+    apenas os que têm dois ou mais caracteres alfanuméricos entram no
+    vocabulário; os demais recebem o id -1, mas continuam ocupando sua posição
+    no texto.
 
-    tokenized_text = " ".join(tokens).split()
+    Parâmetros:
+        tokens (list of str): Sequência de tokens do texto.
+
+    Retorna:
+        tuple: Uma tupla contendo:
+            - vocabulário (numpy.ndarray): Termos em ordem alfabética.
+            - ids (numpy.ndarray): Id de cada token no vocabulário (ou -1).
+    """
+    indices = {}
+    token_ids = np.fromiter(
+        (indices.setdefault(token, len(indices)) if _VOCAB_PATTERN.fullmatch(token) else -1
+         for token in map(str.lower, tokens)),
+        dtype=np.int64
+    )
+
+    # reordena os ids para seguir a ordem alfabética do vocabulário
+    vocabulary = np.array(list(indices), dtype=object)
+    order = np.argsort(vocabulary, kind='stable')
+    rank = np.empty(len(order) + 1, dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    rank[-1] = -1
+
+    return vocabulary[order], rank[token_ids]
+
+def cooccurrence_matrix(token_ids, vocab_size, window_size=2, weighting=None):
+    """
+    Monta a matriz esparsa de coocorrência a partir dos ids dos tokens.
+
+    Os pares de cada distância d (1 até window_size) são gerados de uma vez
+    com deslocamentos vetorizados do NumPy e somados em uma matriz esparsa,
+    então o tempo é linear no número de tokens e a memória é proporcional ao
+    número de pares distintos.
+
+    Parâmetros:
+        token_ids (numpy.ndarray): Id de cada token (-1 para tokens ignorados).
+        vocab_size (int): Tamanho do vocabulário.
+        window_size (int): Tamanho da janela de contexto.
+        weighting (None, str ou callable): None conta cada coocorrência como 1;
+            'inverse' pondera por 1/d; um callable recebe d e retorna o peso.
+
+    Retorna:
+        scipy.sparse.csr_matrix: Matriz (vocab_size x vocab_size) de coocorrência.
+    """
+    token_ids = np.asarray(token_ids, dtype=np.int64)
+    dtype = np.int32 if weighting is None else np.float64
+    ccr = sparse.csr_matrix((vocab_size, vocab_size), dtype=dtype)
+
+    for distance in range(1, window_size + 1):
+        left, right = token_ids[:-distance], token_ids[distance:]
+        mask = (left >= 0) & (right >= 0)
+        left, right = left[mask], right[mask]
+
+        if weighting is None:
+            weight = 1
+        elif weighting == 'inverse':
+            weight = 1.0 / distance
+        else:
+            weight = weighting(distance)
+
+        data = np.full(len(left), weight, dtype=dtype)
 
-    for i, token in enumerate(tokenized_text):
-        if token not in vectorizer.vocabulary_:
-            continue
+        # cada par conta nos dois sentidos (i no contexto de j e j no de i)
+        ccr = ccr + sparse.coo_matrix((data, (left, right)), shape=(vocab_size, vocab_size)).tocsr()
+        ccr = ccr + sparse.coo_matrix((data, (right, left)), shape=(vocab_size, vocab_size)).tocsr()
 
-        token_index = vectorizer.vocabulary_[token]
+    return ccr
+
+def cooccurrence(tokens, window_size=2, weighting=None, return_vocabulary=False):
+    """
+    Calcula a matriz de coocorrência de palavras com base em uma janela de contexto deslizante.
 
-        start = max(0, i - window_size)
-        end = min(len(tokenized_text), i + window_size + 1)
+    Parâmetros:
+        tokens (list of str): Lista de sentenças/documentos em formato de strings.
+        window_size (int): Tamanho da janela de contexto para considerar palavras vizinhas.
+        weighting (None, str ou callable): Ponderação pela distância (ver cooccurrence_matrix).
+        return_vocabulary (bool): Se True, retorna também o vocabulário.
 
-        for j in range(start, end):
-            if i == j:
-                continue
+    Retorna:
+        scipy.sparse.csr_matrix: Matriz esparsa quadrada de coocorrência onde cada célula (i, j)
+        representa quantas vezes a palavra i apareceu no contexto da palavra j. Com
+        return_vocabulary, retorna a tupla (matriz, vocabulário).
+    """
+    tokenized_text = " ".join(tokens).split()
 
-            context_token = tokenized_text[j]
-            if context_token in vectorizer.vocabulary_:
-                context_index = vectorizer.vocabulary_[context_token]
-                ccr[token_index, context_index] += 1
+    vocabulary, token_ids = build_vocabulary(tokenized_text)
+    ccr = cooccurrence_matrix(token_ids, len(vocabulary), window_size, weighting)
 
+    if return_vocabulary:
+        return ccr, vocabulary
     return ccr
@@ -1,14 +1,10 @@
-import streamlit as st
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.llms import CTransformers
+from concurrent.futures import ThreadPoolExecutor
+from ..llm.registry import get_chain, acquire_chain, stream_completion, model_version, POOL_SIZE, CONTEXT_LENGTH, MAX_NEW_TOKENS
+from ..cache.results import ResultCache
+from ..preprocessing.sentences import split_sentences
+from ..llm.tokens import approx_token_count, count_tokens, prompt_budget
 
-# carregamento com cache para economizar recursos
-@st.cache_resource
-def load_model():
-    """Carrega o modelo usado e personaliza o prompt."""
-
-    template = """Abaixo está uma instrução que descreve uma tarefa. Escreva uma resposta que complete adequadamente o pedido.
+TEMPLATE = """Abaixo está uma instrução que descreve uma tarefa. Escreva uma resposta que complete adequadamente o pedido.
 
     ### Instrução:
     Resuma o seguinte texto de forma clara e objetiva:
@@ -17,19 +13,172 @@ def load_model():
 
     ### Resumo:"""
 
-    prompt = PromptTemplate(template=template, input_variables=["instruction"])
-    llm = CTransformers(
-        model="recogna-nlp/bode-7b-alpaca-pt-br-gguf",
-        model_file="bode-7b-alpaca-q8_0.gguf",
-        model_type='llama'
-    )
-    return LLMChain(prompt=prompt, llm=llm)
+# tokens por bloco: o que sobra do contexto depois do prompt e da resposta
+CHUNK_TOKENS = prompt_budget(TEMPLATE, instruction="")
+
+# resumos parciais, por conteúdo do bloco, e resumos finais, por documento
+_chunk_summaries = ResultCache("resumo_bloco", model_version(TEMPLATE, CONTEXT_LENGTH, MAX_NEW_TOKENS), maxsize=1024)
+_summaries = ResultCache("resumo", model_version(TEMPLATE, CONTEXT_LENGTH, MAX_NEW_TOKENS, "reduce"), maxsize=64)
+
+def load_model():
+    """Retorna a cadeia com o prompt desta tarefa sobre o modelo compartilhado."""
+    return get_chain(TEMPLATE)
+
+def chunk_text(texto, max_tokens=CHUNK_TOKENS):
+    """Agrupa frases consecutivas em blocos que cabem no contexto do modelo.
+
+    O tamanho das frases é estimado sem tokenizar (approx_token_count), então
+    dividir o texto não exige carregar o modelo.
+    """
+    blocos = []
+    atual = []
+    tamanho = 0
+
+    for frase in split_sentences(texto):
+        custo = approx_token_count(frase)
+
+        # frase maior que o bloco inteiro é dividida por palavras
+        if custo > max_tokens:
+            if atual:
+                blocos.append(" ".join(atual))
+                atual, tamanho = [], 0
+
+            partes = []
+            for palavra in frase.split():
+                if partes and approx_token_count(" ".join(partes + [palavra])) > max_tokens:
+                    blocos.append(" ".join(partes))
+                    partes = []
+                partes.append(palavra)
+
+            frase = " ".join(partes)
+            custo = approx_token_count(frase)
+
+        if tamanho + custo > max_tokens and atual:
+            blocos.append(" ".join(atual))
+            atual, tamanho = [], 0
+
+        if frase:
+            atual.append(frase)
+            tamanho += custo
+
+    if atual:
+        blocos.append(" ".join(atual))
+
+    return blocos
+
+def _split_in_half(bloco):
+    """Divide um bloco ao meio, por palavras (ou por caracteres, se for uma única palavra)."""
+    palavras = bloco.split()
+    if len(palavras) > 1:
+        meio = len(palavras) // 2
+        return [" ".join(palavras[:meio]), " ".join(palavras[meio:])]
+    meio = len(bloco) // 2
+    return [bloco[:meio], bloco[meio:]]
+
+def fit_chunks(blocos, max_tokens=CHUNK_TOKENS):
+    """Confere o tamanho de cada bloco com o tokenizador do modelo.
+
+    chunk_text usa apenas a estimativa; blocos que passam de max_tokens são
+    divididos de novo (com a proporção real de caracteres por token do
+    próprio bloco) em vez de truncados, então nenhum trecho é descartado.
+    """
+    ajustados = []
+    pendentes = list(reversed(blocos))
+
+    while pendentes:
+        bloco = pendentes.pop()
+        tokens = count_tokens(bloco)
+        if tokens <= max_tokens:
+            ajustados.append(bloco)
+            continue
 
-def resumir_texto(texto):
-    """Função de resumir o texto enviado pelo usuário."""
+        partes = chunk_text(bloco, max(1, approx_token_count(bloco) * max_tokens // tokens))
+        if len(partes) < 2:
+            partes = _split_in_half(bloco)
+        pendentes.extend(reversed(partes))
+
+    return ajustados
+
+def summarize_chunk(bloco):
+    """Resume um bloco, reutilizando o resultado se o mesmo conteúdo já foi resumido."""
+    def compute():
+        with acquire_chain(TEMPLATE) as llm_chain:
+            return llm_chain.run(bloco)
+
+    return _chunk_summaries.get_or_compute(_chunk_summaries.key(bloco), compute)
+
+def _reduce_to_single_chunk(texto, max_tokens):
+    """Resume os blocos em paralelo até restar um único bloco (etapa map-reduce).
+
+    Cada nível reduz o número de blocos, já que cada resumo tem no máximo
+    MAX_NEW_TOKENS tokens. Se um nível não reduzir (max_tokens pequeno demais
+    para os resumos), lança ValueError em vez de descartar parte do texto.
+    """
+    blocos = fit_chunks(chunk_text(texto, max_tokens), max_tokens)
+
+    while len(blocos) > 1:
+        with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+            resumos = list(executor.map(summarize_chunk, blocos))
+
+        reduzidos = fit_chunks(chunk_text("\n\n".join(resumos), max_tokens), max_tokens)
+        if len(reduzidos) >= len(blocos):
+            raise ValueError(f"Os resumos parciais não cabem em blocos de {max_tokens} tokens.")
+
+        blocos = reduzidos
+
+    return blocos[0] if blocos else ""
+
+def resumir_texto(texto, max_tokens=CHUNK_TOKENS):
+    """Função de resumir o texto enviado pelo usuário.
+
+    Textos maiores que o contexto do modelo são resumidos de forma hierárquica
+    (map-reduce): o texto é dividido em blocos nas fronteiras das frases, os
+    blocos são resumidos em paralelo e os resumos parciais são resumidos
+    novamente até caberem em um único bloco. Como cada bloco é guardado em
+    cache pelo hash do conteúdo, ao editar o documento apenas os blocos
+    alterados são resumidos de novo; o resumo de um documento já resumido
+    é retornado direto do cache.
+    """
     try:
-        llm_chain = load_model()
-        resumo = llm_chain.run(texto)
-        return resumo
+        def compute():
+            bloco = _reduce_to_single_chunk(texto, max_tokens)
+            return summarize_chunk(bloco) if bloco else ""
+
+        return _summaries.get_or_compute(_summaries.key(texto, str(max_tokens)), compute)
     except Exception as e:
         return f"Desculpe, ocorreu um erro ao gerar o resumo: {str(e)}"
+
+def resumir_texto_stream(texto, stats=None, max_tokens=CHUNK_TOKENS):
+    """Versão em streaming de resumir_texto: o resumo final é gerado token a token.
+
+    Os resumos parciais de textos longos continuam sendo calculados antes; só
+    a última etapa é transmitida. Se o resumo final já estiver em cache, é
+    retornado de uma vez.
+    """
+    try:
+        chave_documento = _summaries.key(texto, str(max_tokens))
+        resumo = _summaries.get(chave_documento)
+        if resumo is None:
+            bloco = _reduce_to_single_chunk(texto, max_tokens)
+            if not bloco:
+                return
+            chave = _chunk_summaries.key(bloco)
+            resumo = _chunk_summaries.get(chave)
+
+        if resumo is not None:
+            _summaries.set(chave_documento, resumo)
+            if stats is not None:
+                stats.record()
+            yield resumo
+            return
+
+        partes = []
+        for token in stream_completion(TEMPLATE, stats, instruction=bloco):
+            partes.append(token)
+            yield token
+
+        resumo = "".join(partes)
+        _chunk_summaries.set(chave, resumo)
+        _summaries.set(chave_documento, resumo)
+    except Exception as e:
+        yield f"Desculpe, ocorreu um erro ao gerar o resumo: {str(e)}"
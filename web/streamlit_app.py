@@ -2,20 +2,22 @@ import streamlit as st
 import sys
 import os
 from io import StringIO
-import gc
+import pandas as pd
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
-from src.extract_pdf.extractor import extract_pdf_to_text
-from src.preprocessing.cleaner import clean_text
-from src.preprocessing.tokenizer import tokenizer, word_counter
-from src.analysis.statistics import calculate_metrics, calculate_tfidf
+from src.extract_pdf.extractor import extract_pdf_to_text, iter_pdf_pages, get_pdf_page
+from src.preprocessing.tokenizer import tokenize_text
 from src.classification.model import classificador, create_plotly_visualization
-from src.analysis.visualization import plot_metrics, generate_wordcloud, plot_tfidf, plot_word_frequency
-from src.question.question import answer_question
-from src.summarization.summarizer import resumir_texto
-# from src.representation import bow, cooccurrence
+from src.analysis.visualization import plot_metrics, generate_wordcloud, plot_tfidf, plot_word_frequency, plot_cooccurrence
+from src.question.question import answer_question_stream
+from src.summarization.summarizer import resumir_texto_stream
+from src.pipeline.analyzer import analyze_stream, analyze_pages, read_source
+from src.pipeline.incremental import IncrementalAnalyzer
+from src.analysis.tfidf import load_default_model
+from src.pipeline.stages import cooccurrence_stage
+from src.llm.registry import configure_from_env, StreamStats
 
 st.set_page_config(layout="wide")
 
@@ -31,83 +33,82 @@ LABELS_MAP_PT = {
     'Promotion': 'Promocional'
 } 
 
-def process_large_file(uploaded_file, chunk_size=1024*1024):  # 1MB chunks
-    """ Processa arquivos grandes em chunks"""
-    text_chunks = []
-    
-    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-        try:
-            uploaded_file.seek(0)
-            
-            while True:
-                chunk = uploaded_file.read(chunk_size).decode(encoding)
-                if not chunk:
-                    break
-                text_chunks.append(chunk)
-            
-                gc.collect()
-            
-            return ''.join(text_chunks)
-            
-        except UnicodeDecodeError:
-            continue
-    
-    raise ValueError("Não foi possível decodificar o arquivo com nenhuma codificação suportada.")
-
-@st.cache_data(max_entries=3)  # cache apenas os 3 últimos resultados
-def process_text_chunked(text):
-    """ Processa com memória eficiente """
-    chunk_size = 1024 * 1024  # 1MB chunks
-    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
-    
-    all_tokens = []
-    all_word_counts = {}
-    
-    for chunk in chunks:
-
-        cleaned_chunk = clean_text(chunk)
-        chunk_tokens = tokenizer(cleaned_chunk)
-        
-        all_tokens.extend(chunk_tokens)
-        
-        chunk_counts = word_counter(chunk_tokens)
-        for word, count in chunk_counts.items():
-            all_word_counts[word] = all_word_counts.get(word, 0) + count
-        
-        gc.collect()
-    
-    metrics = calculate_metrics(all_tokens)
-    df_tfidf = calculate_tfidf(all_tokens)
-    
-    return ' '.join(all_tokens), all_tokens, all_word_counts, metrics, df_tfidf
-
-def save_temp_text(text):
-    """ Salva o arquivo de forma temporária """
-    data_dir = os.path.join(root_dir, 'data')
-    os.makedirs(data_dir, exist_ok=True)
-    file_path = os.path.join(data_dir, 'teste.txt')
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(text)
-    return file_path
+def read_preview(uploaded_file, size=1000):
+    """ Lê apenas o início do arquivo para a pré-visualização """
+    uploaded_file.seek(0)
+    preview = uploaded_file.read(size * 4).decode('utf-8', errors='ignore')
+    return preview[:size] + "..." if len(preview) > size else preview
+
+def read_uploaded_text(uploaded_file):
+    """ Decodifica o arquivo inteiro, usado apenas pelas seções que precisam do texto completo """
+    uploaded_file.seek(0)
+    return read_source(uploaded_file)
+
+@st.cache_data(max_entries=4, show_spinner="Extraindo texto do PDF...")
+def read_pdf_text(data):
+    """ Texto completo do PDF, extraído uma única vez por arquivo e só quando uma seção precisa dele """
+    return extract_pdf_to_text(data)
+
+def read_pdf_preview(uploaded_pdf, size=1000):
+    """ Extrai apenas as primeiras páginas do PDF para a pré-visualização """
+    preview = ""
+    for _, texto in iter_pdf_pages(uploaded_pdf, workers=1):
+        preview += texto + "\n"
+        if len(preview) > size:
+            return preview[:size] + "..."
+    return preview
+
+def get_document_text(uploaded_file, uploaded_pdf, text_input):
+    """ Texto original do documento, conforme o método de entrada """
+    if uploaded_file is not None:
+        return read_uploaded_text(uploaded_file)
+    if uploaded_pdf is not None:
+        return read_pdf_text(uploaded_pdf.getvalue())
+    return text_input
+
+def get_result_tokens(result, load_text):
+    """ Tokens do documento; na análise em streaming só são gerados quando uma seção precisa deles """
+    if result.tokens is not None:
+        return result.tokens
+    return tokenize_text(load_text())
+
+@st.cache_resource
+def init_llm():
+    """ Aplica uma única vez por servidor o pré-carregamento e a liberação por inatividade do modelo """
+    configure_from_env()
+
+@st.cache_resource
+def load_idf_model():
+    """ Carrega uma única vez o modelo de IDF de referência (None se não houver) """
+    return load_default_model()
+
+def process_file(uploaded_file):
+    """ Processa arquivos grandes em streaming, com memória limitada pelo vocabulário """
+    return analyze_stream(uploaded_file, idf_model=load_idf_model())
+
+def process_pdf(uploaded_pdf):
+    """ Analisa o PDF página a página, sem montar o texto completo """
+    return analyze_pages(iter_pdf_pages(uploaded_pdf), idf_model=load_idf_model())
 
 def process_text(text):
-    """ Faz os processamentos necessários no texto """
-    save_temp_text(text)
-    cleaned_text = clean_text()
-    tokens = tokenizer(cleaned_text)
-    word_counts = word_counter(tokens)
-    metrics = calculate_metrics(tokens)
-    df_tfidf = calculate_tfidf(tokens)
+    """ Faz os processamentos necessários no texto, inteiramente em memória.
 
-    return cleaned_text, tokens, word_counts, metrics, df_tfidf
+    O analisador incremental fica na sessão: a cada nova análise, apenas os
+    parágrafos alterados desde a anterior são processados.
+    """
+    if st.session_state.get('incremental') is None:
+        st.session_state.incremental = IncrementalAnalyzer(load_idf_model())
+    return st.session_state.incremental.analyze(text)
 
-def render_visualization(viz_type, tokens, metrics, word_counts, df_tfidf):
+def render_visualization(viz_type, result, load_text):
     """ Carrega as visualizações necessárias para cada tipo de gráfico """
+    metrics, word_counts, df_tfidf = result.metrics, result.word_counts, result.df_tfidf
+
     if viz_type == "Nuvem de Palavras":
         st.subheader("Nuvem de Palavras")
         col1, col2, col3 = st.columns([1,5,1])  
         with col2:  
-            fig_wordcloud = generate_wordcloud(tokens)
+            fig_wordcloud = generate_wordcloud(word_counts)
             if fig_wordcloud:
                 st.pyplot(fig_wordcloud, use_container_width=True)
     
@@ -136,10 +137,27 @@ def render_visualization(viz_type, tokens, metrics, word_counts, df_tfidf):
             fig_tfidf = plot_tfidf(df_tfidf)
             st.pyplot(fig_tfidf, use_container_width=True)
 
+    elif viz_type == "Coocorrência":
+        st.subheader("Coocorrência de Palavras")
+        col1, col2, col3 = st.columns([1,5,1])
+        with col2:
+            # a matriz só é calculada quando essa visualização é aberta e fica em cache por documento
+            with st.spinner("Calculando coocorrências..."):
+                ccr, vocabulary = cooccurrence_stage(
+                    result, load_tokens=lambda: get_result_tokens(result, load_text)
+                )
+            fig_ccr = plot_cooccurrence(ccr, vocabulary, word_counts)
+            if fig_ccr:
+                st.pyplot(fig_ccr, use_container_width=True)
+            else:
+                st.warning("Não há palavras suficientes para calcular as coocorrências.")
+
 def initialize_session_state():
     """ Inicialização de estados """
     if 'processed_data' not in st.session_state:
         st.session_state.processed_data = None
+    if 'analyzed_input' not in st.session_state:
+        st.session_state.analyzed_input = (None, None, "")
     if 'viz_type' not in st.session_state:
         st.session_state.viz_type = "Nuvem de Palavras"
     if 'tab' not in st.session_state:
@@ -174,7 +192,7 @@ def get_metrics_interpretation(media, mediana, desvio_padrao):
     
     return interpretacao
 
-def render_classification_section(tokens):
+def render_classification_section(texto_completo):
     """Renderiza a seção de classificação no Streamlit com visualizações aprimoradas."""
     st.subheader("Classificação do Texto")
     
@@ -183,10 +201,8 @@ def render_classification_section(tokens):
     """)
     
     with st.spinner('Realizando classificação do texto... Isso pode levar alguns segundos.'):
-        texto_completo = " ".join(tokens)
-        texto_para_classificacao = texto_completo[:min(len(texto_completo), 512)]
-        
-        genero_results = classificador(texto_para_classificacao)
+        # o texto original inteiro é classificado em janelas, sem remover as stopwords
+        genero_results = classificador(texto_completo)
         
         if genero_results and isinstance(genero_results, list) and len(genero_results) > 0:
     
@@ -226,6 +242,30 @@ def render_classification_section(tokens):
         else:
             st.warning("Não foi possível classificar o texto. Verifique se o texto possui conteúdo suficiente ou tente novamente.")
 
+def render_pages_section(result, uploaded_pdf):
+    """Renderiza a navegação por páginas de documentos PDF."""
+    st.subheader("Navegação por Páginas")
+
+    df_paginas = pd.DataFrame(result.pages)
+    st.bar_chart(df_paginas, x="pagina", y="n_tokens", x_label="Página", y_label="Tokens")
+
+    pagina = st.number_input("Página", min_value=1, max_value=len(result.pages), value=1, step=1)
+    info = result.pages[pagina - 1]
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.metric("Tokens na página", info["n_tokens"])
+    with col2:
+        st.markdown("**Palavras-chave:** " + (", ".join(info["palavras_chave"]) or "—"))
+
+    if uploaded_pdf is not None:
+        with st.expander("Mostrar texto da página"):
+            st.write(get_pdf_page(uploaded_pdf, pagina) or "Página sem texto extraído.")
+
+    with st.expander("Todas as páginas"):
+        df_paginas["palavras_chave"] = df_paginas["palavras_chave"].str.join(", ")
+        st.dataframe(df_paginas, use_container_width=True, hide_index=True)
+
 def render_summarization_section(texto_completo):
     """Renderiza a seção de sumarização separadamente"""
     st.subheader("Sumarização do Texto")
@@ -237,12 +277,23 @@ def render_summarization_section(texto_completo):
     
     if st.button("Gerar Resumo"):
         st.info("O processamento pode levar alguns segundos. Por favor, aguarde...")
-        with st.spinner("Gerando resumo..."):
-            try:
-                resumo = resumir_texto(texto_completo)
-                st.write(resumo)
-            except Exception as e:
-                st.error(f"Erro ao gerar resumo: {str(e)}")
+        try:
+            # o resumo aparece à medida que os tokens são gerados
+            stats = StreamStats()
+            st.write_stream(resumir_texto_stream(texto_completo, stats))
+            render_stream_stats(stats)
+        except Exception as e:
+            st.error(f"Erro ao gerar resumo: {str(e)}")
+
+def render_stream_stats(stats):
+    """Mostra o tempo até o primeiro token e a velocidade da geração"""
+    if stats.ttft is None:
+        return
+
+    legenda = f"Primeiro token em {stats.ttft:.2f}s · Tempo total: {stats.total_time:.2f}s"
+    if stats.tokens_per_second:
+        legenda += f" · {stats.tokens_per_second:.1f} tokens/s"
+    st.caption(legenda)
 
 def get_genre_description(genre_name):
     """Retorna uma descrição detalhada para o gênero textual específico."""
@@ -314,9 +365,10 @@ def render_question(text_input):
     if question:
         st.info("O processamento pode levar alguns segundos. Por favor, aguarde...")
         try:
-            answer = answer_question(text_input[:512])
             st.subheader("Resposta:")
-            st.write(answer)
+            stats = StreamStats()
+            st.write_stream(answer_question_stream(text_input, question, stats))
+            render_stream_stats(stats)
         except Exception as e:
             st.error(f"Erro ao processar pergunta: {str(e)}")
 
@@ -324,6 +376,7 @@ def render_question(text_input):
 def main():
 
     initialize_session_state()
+    init_llm()
 
     st.title('Analisador de Texto')
     
@@ -333,6 +386,8 @@ def main():
     )
     
     text_input = ""
+    uploaded_file = None
+    uploaded_pdf = None
 
     if input_method == "Digitar texto":
         # área de texto para entrada manual
@@ -357,13 +412,10 @@ def main():
                 st.warning("Arquivo grande detectado. O processamento pode levar mais tempo.")
             
             try:
-                with st.spinner('Carregando arquivo...'):
-                    text_input = process_large_file(uploaded_file)
-                    st.session_state.text_input = text_input
-                    st.session_state.uploaded_file_name = uploaded_file.name
+                st.session_state.uploaded_file_name = uploaded_file.name
                     
                 with st.expander("Mostrar Preview do Arquivo"):
-                    st.write(text_input[:1000] + "..." if len(text_input) > 1000 else text_input)
+                    st.write(read_preview(uploaded_file))
                     
             except Exception as e:
                 st.error(f"Erro ao processar o arquivo: {str(e)}")
@@ -381,16 +433,11 @@ def main():
             st.info(f"Tamanho do arquivo PDF: {file_size:.2f}MB")
             
             try:
-                with st.spinner('Extraindo texto do PDF...'):
-                    text_input = extract_pdf_to_text(uploaded_pdf)
-                    st.session_state.text_input = text_input
-                    st.session_state.uploaded_file_name = uploaded_pdf.name
-                    
-                if text_input:
-                    st.success(f"Texto extraído com sucesso do arquivo: {uploaded_pdf.name}")
-                    
-                    with st.expander("Mostrar Preview do Texto Extraído"):
-                        st.write(text_input[:1000] + "..." if len(text_input) > 1000 else text_input)
+                # o texto completo não é extraído aqui: a análise consome as páginas uma a uma
+                st.session_state.uploaded_file_name = uploaded_pdf.name
+
+                with st.expander("Mostrar Preview do Texto Extraído"):
+                    st.write(read_pdf_preview(uploaded_pdf))
 
                         
             except Exception as e:
@@ -399,10 +446,18 @@ def main():
     
     analyze_button = st.button('Analisar Texto')
     if analyze_button:
-        if text_input:
+        if text_input or uploaded_file or uploaded_pdf:
             with st.spinner('Processando texto...'):
                 try:
-                    st.session_state.processed_data = process_text(text_input)
+                    if uploaded_file:
+                        st.session_state.processed_data = process_file(uploaded_file)
+                        st.session_state.analyzed_input = (uploaded_file, None, "")
+                    elif uploaded_pdf:
+                        st.session_state.processed_data = process_pdf(uploaded_pdf)
+                        st.session_state.analyzed_input = (None, uploaded_pdf, "")
+                    else:
+                        st.session_state.processed_data = process_text(text_input)
+                        st.session_state.analyzed_input = (None, None, text_input)
                     st.session_state.tab = "Estatísticas"
                 except Exception as e:
                     st.error(f"Erro durante o processamento: {str(e)}")
@@ -411,15 +466,25 @@ def main():
             st.warning('Por favor, insira um texto ou faça upload de um arquivo para análise.')
     
     if st.session_state.processed_data is not None:
-        cleaned_text, tokens, word_counts, metrics, df_tfidf = st.session_state.processed_data
-        
+        result = st.session_state.processed_data
+        word_counts, metrics, df_tfidf = result.word_counts, result.metrics, result.df_tfidf
+
+        # o texto completo só é obtido pelas seções que precisam dele, sempre a
+        # partir da entrada analisada (e não dos widgets atuais, que podem ter
+        # mudado); os tokens carregados alimentam caches indexados por doc_hash
+        analyzed_file, analyzed_pdf, analyzed_text = st.session_state.analyzed_input
+        load_text = lambda: get_document_text(analyzed_file, analyzed_pdf, analyzed_text)
+
+        tabs = ["Estatísticas", "Visualizações", "Busca e Informações", "Classificação", "Sumarização"]
+        if result.pages:
+            tabs.append("Páginas")
+
         st.session_state.tab = st.radio(
             "",
-            ["Estatísticas", "Visualizações", "Busca e Informações", "Classificação", "Sumarização"],
+            tabs,
             horizontal=True,
             label_visibility="hidden",
-            index=["Estatísticas", "Visualizações", "Busca e Informações", "Classificação", "Sumarização"].index(st.session_state.tab) 
-            if st.session_state.tab in ["Estatísticas", "Visualizações", "Busca e Informações", "Classificação", "Sumarização"] else 0
+            index=tabs.index(st.session_state.tab) if st.session_state.tab in tabs else 0
         )
         
         st.divider()
@@ -498,12 +563,21 @@ def main():
                         use_container_width=True,
                         height=400
                     )
+
+                    # a tabela completa só é calculada quando solicitada
+                    if st.checkbox("Mostrar todos os termos"):
+                        df_completo = result.tfidf_table().reset_index(drop=True)
+                        st.dataframe(
+                            df_completo.style.format(precision=4),
+                            use_container_width=True,
+                            height=400
+                        )
                 else:
                     st.warning("Não há dados TF-IDF disponíveis para exibição.")
         
         elif st.session_state.tab == "Visualizações":
             st.container()
-            render_visualization(st.session_state.viz_type, tokens, metrics, word_counts, df_tfidf)
+            render_visualization(st.session_state.viz_type, result, load_text)
 
             st.divider()
 
@@ -513,10 +587,11 @@ def main():
                 "Nuvem de Palavras": "Visualização das palavras mais frequentes em forma de nuvem. Útil para identificar rapidamente os termos mais recorrentes no texto e ter uma visão geral do seu conteúdo.",
                 "Métricas": "Gráfico comparativo das métricas de comprimento de palavras no texto. Indicado para analisar a complexidade do vocabulário utilizado, identificando se o texto tende a ser mais informal ou técnico.",
                 "Frequência de Palavras": "Distribuição das palavras mais frequentes. Permite entender quais palavras aparecem com maior frequência e detectar possíveis padrões ou repetições excessivas.",
-                "Análise TF-IDF": "Visualização dos termos mais relevantes com base na métrica TF-IDF. Essencial para identificar palavras-chave que diferenciam o texto e são importantes para sua compreensão."
+                "Análise TF-IDF": "Visualização dos termos mais relevantes com base na métrica TF-IDF. Essencial para identificar palavras-chave que diferenciam o texto e são importantes para sua compreensão.",
+                "Coocorrência": "Mapa de calor das palavras que aparecem próximas umas das outras. Ajuda a perceber associações e contextos recorrentes entre os termos principais do texto."
             }
 
-            cols = st.columns(4)
+            cols = st.columns(len(viz_options))
             for idx, (viz_name, viz_desc) in enumerate(viz_options.items()):
                 with cols[idx]:
                     if st.button(
@@ -532,14 +607,18 @@ def main():
     
         
         elif st.session_state.tab == "Classificação":
-            render_classification_section(tokens)
+            render_classification_section(load_text())
             
         elif st.session_state.tab == "Sumarização":
-            texto_completo = " ".join(tokens)
+            # o texto original preserva as fronteiras das frases usadas na divisão em blocos
+            texto_completo = load_text()
             render_summarization_section(texto_completo)
 
         elif st.session_state.tab == "Busca e Informações":
-            render_question(text_input)
+            render_question(load_text())
+
+        elif st.session_state.tab == "Páginas":
+            render_pages_section(result, analyzed_pdf)
     
     with st.expander("Sobre o Analisador de Texto"):
         st.write("""